@@ -1,84 +1,88 @@
-from flask import render_template, request, redirect, url_for, flash, session
-from werkzeug.security import check_password_hash, generate_password_hash
+from flask import render_template, request, redirect, url_for, flash, session, jsonify
+from flask_login import login_user, logout_user
 from app import app, db
-from models import User, Order, Feedback
-from data_store import get_service_by_id, get_plan_by_id
-from datetime import datetime, timedelta
-import functools
-
-def admin_required(f):
-    """Decorator to require admin authentication"""
-    @functools.wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get('admin_logged_in'):
-            return redirect(url_for('admin_login'))
-        return f(*args, **kwargs)
-    return decorated_function
-
-@app.route('/admin/login', methods=['GET', 'POST'])
+from models import Order, Feedback
+from auth import admin_required, authenticate, user_cache_info, VerifierBusy
+from data_store import get_service_by_id, get_plan_by_id, get_kpi_snapshot, invalidate_stats, stats_cache_info
+from page_cache import page_cache_info
+from templating import fragment_cache_info
+from admin_search import order_search_filter, feedback_search_filter
+from pagination import keyset_paginate
+from replicas import read_only
+from bulk import import_orders, detect_format
+from exports import export_response, ORDER_EXPORT_COLUMNS, FEEDBACK_EXPORT_COLUMNS
+from sessions import rotate_session
+import ratelimit
+import analytics
+import io
+from datetime import datetime
+
+def filtered_orders(status_filter, search):
+    """Order query with the admin list's status and search filters applied"""
+    query = Order.query
+    
+    if status_filter != 'all':
+        query = query.filter(Order.status == status_filter)
+    
+    if search:
+        query = query.filter(order_search_filter(search))
+    
+    return query
+
+def filtered_feedbacks(status_filter, search):
+    """Feedback query with the admin list's status and search filters applied"""
+    query = Feedback.query
+    
+    if status_filter != 'all':
+        query = query.filter(Feedback.is_processed == (status_filter == 'processed'))
+    
+    if search:
+        query = query.filter(feedback_search_filter(search))
+    
+    return query
+
 def admin_login():
     """Admin login page"""
     if request.method == 'POST':
-        username = request.form.get('username')
-        password = request.form.get('password')
+        username = request.form.get('username', '').strip()
+        ip = request.remote_addr
+        ratelimit.check('login', ip=ip, ip_username=username and f'{ip}|{username}')
+        try:
+            user = authenticate(username, request.form.get('password'))
+        except VerifierBusy:
+            flash('Hệ thống đang bận, vui lòng thử lại sau giây lát.', 'error')
+            return render_template('admin/login.html'), 503
         
-        # Simple admin authentication (in production, use proper user management)
-        if username == 'admin' and password == 'admin123':
-            session['admin_logged_in'] = True
-            session['admin_username'] = username
+        if user:
+            rotate_session(session)
+            login_user(user)
+            session['admin_username'] = user.username
             flash('Đăng nhập thành công!', 'success')
-            return redirect(url_for('admin_dashboard'))
+            next_url = request.args.get('next', '')
+            # Only follow local paths, never another host
+            if not next_url.startswith('/') or next_url.startswith('//'):
+                next_url = url_for('admin_dashboard')
+            return redirect(next_url)
         else:
             flash('Tên đăng nhập hoặc mật khẩu không đúng!', 'error')
     
     return render_template('admin/login.html')
 
-@app.route('/admin/logout')
 def admin_logout():
     """Admin logout"""
-    session.pop('admin_logged_in', None)
+    logout_user()
     session.pop('admin_username', None)
     flash('Đã đăng xuất thành công!', 'success')
     return redirect(url_for('admin_login'))
 
-@app.route('/admin')
-@app.route('/admin/dashboard')
 @admin_required
+@read_only
 def admin_dashboard():
     """Admin dashboard with KPIs"""
     
-    # Calculate date ranges
-    today = datetime.now().date()
-    yesterday = today - timedelta(days=1)
-    last_week = today - timedelta(days=7)
-    last_month = today - timedelta(days=30)
-    
-    # Get statistics
-    stats = {
-        'total_orders': Order.query.count(),
-        'orders_today': Order.query.filter(Order.created_at >= today).count(),
-        'orders_yesterday': Order.query.filter(
-            Order.created_at >= yesterday,
-            Order.created_at < today
-        ).count(),
-        'orders_week': Order.query.filter(Order.created_at >= last_week).count(),
-        'orders_month': Order.query.filter(Order.created_at >= last_month).count(),
-        'pending_orders': Order.query.filter_by(status='pending').count(),
-        'in_progress_orders': Order.query.filter_by(status='in_progress').count(),
-        'completed_orders': Order.query.filter_by(status='completed').count(),
-        'total_feedbacks': Feedback.query.count(),
-        'new_feedbacks': Feedback.query.filter_by(status='new').count(),
-        'total_revenue': db.session.query(db.func.sum(Order.total_amount)).scalar() or 0,
-        'revenue_month': db.session.query(db.func.sum(Order.total_amount)).filter(
-            Order.created_at >= last_month
-        ).scalar() or 0
-    }
-    
-    # Calculate conversion rate
-    stats['conversion_rate'] = (
-        (stats['completed_orders'] / stats['total_orders'] * 100) 
-        if stats['total_orders'] > 0 else 0
-    )
+    # Get statistics (one aggregate query per table)
+    stats = get_kpi_snapshot()
+    stats['new_feedbacks'] = stats['unprocessed_feedbacks']
     
     # Get recent orders
     recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
@@ -91,45 +95,33 @@ def admin_dashboard():
                          recent_orders=recent_orders,
                          recent_feedbacks=recent_feedbacks)
 
-@app.route('/admin/orders')
 @admin_required
+@read_only
 def admin_orders():
     """Admin orders management"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
+    estimate_total = request.args.get('estimate', 0, type=int) == 1
     status_filter = request.args.get('status', 'all')
     search = request.args.get('search', '')
     
-    # Build query
-    query = Order.query
+    query = filtered_orders(status_filter, search)
     
-    if status_filter != 'all':
-        query = query.filter(Order.status == status_filter)
+    # Paginate results by (created_at, id) cursor
+    orders = keyset_paginate(query, Order, cursor=cursor, per_page=20,
+                             estimate_total=estimate_total)
     
-    if search:
-        query = query.filter(
-            db.or_(
-                Order.customer_name.ilike(f'%{search}%'),
-                Order.customer_email.ilike(f'%{search}%'),
-                Order.service_type.ilike(f'%{search}%')
-            )
-        )
-    
-    # Paginate results
-    orders = query.order_by(Order.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
-    
-    # Get service and plan names for each order
+    # Get service and plan names for each order (the raw id for retired ones)
     for order in orders.items:
-        order.service_name = get_service_by_id(order.service_type)
-        order.plan_name = get_plan_by_id(order.plan_type)
+        service = get_service_by_id(order.service_type)
+        plan = get_plan_by_id(order.plan_type)
+        order.service_name = service.name if service else order.service_type
+        order.plan_name = plan.name_vi if plan else order.plan_type
     
     return render_template('admin/orders.html',
                          orders=orders,
                          status_filter=status_filter,
                          search=search)
 
-@app.route('/admin/orders/<int:order_id>/status', methods=['POST'])
 @admin_required
 def update_order_status(order_id):
     """Update order status"""
@@ -142,6 +134,7 @@ def update_order_status(order_id):
         
         try:
             db.session.commit()
+            invalidate_stats()
             flash(f'Đã cập nhật trạng thái đơn hàng #{order.id}', 'success')
         except Exception as e:
             db.session.rollback()
@@ -149,41 +142,56 @@ def update_order_status(order_id):
     
     return redirect(url_for('admin_orders'))
 
-@app.route('/admin/feedbacks')
 @admin_required
+@read_only
+def export_orders(fmt):
+    """Stream all orders matching the list filters as CSV or JSON lines"""
+    query = filtered_orders(request.args.get('status', 'all'), request.args.get('search', ''))
+    return export_response(query, Order, ORDER_EXPORT_COLUMNS, fmt, 'orders',
+                           compress=request.args.get('gzip', 0, type=int) == 1)
+
+@admin_required
+def import_orders_upload():
+    """Bulk import orders from an uploaded file or a CSV/JSON(-lines) request body"""
+    upload = request.files.get('file')
+    if upload is not None:
+        raw, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        raw, filename, content_type = request.stream, None, request.mimetype
+    fmt = request.args.get('format') or detect_format(filename, content_type)
+    
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    report = import_orders(stream, fmt)
+    return jsonify(report.to_dict())
+
+@admin_required
+@read_only
 def admin_feedbacks():
     """Admin feedbacks management"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
+    estimate_total = request.args.get('estimate', 0, type=int) == 1
     status_filter = request.args.get('status', 'all')
     search = request.args.get('search', '')
     
-    # Build query
-    query = Feedback.query
+    query = filtered_feedbacks(status_filter, search)
     
-    if status_filter != 'all':
-        query = query.filter(Feedback.status == status_filter)
-    
-    if search:
-        query = query.filter(
-            db.or_(
-                Feedback.name.ilike(f'%{search}%'),
-                Feedback.email.ilike(f'%{search}%'),
-                Feedback.subject.ilike(f'%{search}%'),
-                Feedback.message.ilike(f'%{search}%')
-            )
-        )
-    
-    # Paginate results
-    feedbacks = query.order_by(Feedback.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    # Paginate results by (created_at, id) cursor
+    feedbacks = keyset_paginate(query, Feedback, cursor=cursor, per_page=20,
+                                estimate_total=estimate_total)
     
     return render_template('admin/feedbacks.html',
                          feedbacks=feedbacks,
                          status_filter=status_filter,
                          search=search)
 
-@app.route('/admin/feedbacks/<int:feedback_id>/status', methods=['POST'])
+@admin_required
+@read_only
+def export_feedbacks(fmt):
+    """Stream all feedback matching the list filters as CSV or JSON lines"""
+    query = filtered_feedbacks(request.args.get('status', 'all'), request.args.get('search', ''))
+    return export_response(query, Feedback, FEEDBACK_EXPORT_COLUMNS, fmt, 'feedbacks',
+                           compress=request.args.get('gzip', 0, type=int) == 1)
+
 @admin_required
 def update_feedback_status(feedback_id):
     """Update feedback status"""
@@ -191,10 +199,11 @@ def update_feedback_status(feedback_id):
     new_status = request.form.get('status')
     
     if new_status in ['new', 'processed']:
-        feedback.status = new_status
+        feedback.is_processed = new_status == 'processed'
         
         try:
             db.session.commit()
+            invalidate_stats()
             flash(f'Đã cập nhật trạng thái phản hồi #{feedback.id}', 'success')
         except Exception as e:
             db.session.rollback()
@@ -202,8 +211,49 @@ def update_feedback_status(feedback_id):
     
     return redirect(url_for('admin_feedbacks'))
 
-@app.route('/admin/orders/<int:order_id>')
 @admin_required
+def process_feedback(feedback_id):
+    """Mark feedback as processed"""
+    feedback = Feedback.query.get_or_404(feedback_id)
+    feedback.is_processed = True
+    db.session.commit()
+    invalidate_stats()
+    
+    flash(f'Đã đánh dấu phản hồi #{feedback.id} đã xử lý', 'success')
+    return redirect(url_for('admin_feedbacks'))
+
+@admin_required
+def admin_cache_stats():
+    """Cache counters for the worker serving this request"""
+    return jsonify({'stats': stats_cache_info(), 'pages': page_cache_info(),
+                    'fragments': fragment_cache_info(), 'analytics': analytics.analytics_cache_info(),
+                    'users': user_cache_info()})
+
+@admin_required
+@read_only
+def analytics_timeseries():
+    """Order and revenue trend per day/week/month, optionally by service or plan"""
+    try:
+        bucket, start, end, dimension = analytics.parse_range(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(analytics.timeseries(bucket, start, end, dimension))
+
+@admin_required
+@read_only
+def analytics_cohorts():
+    """Conversion from pending to completed for orders placed in each period"""
+    args = request.args.copy()
+    args.setdefault('bucket', 'month')
+    args.pop('by', None)
+    try:
+        bucket, start, end, _ = analytics.parse_range(args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(analytics.cohorts(bucket, start, end))
+
+@admin_required
+@read_only
 def admin_order_detail(order_id):
     """Admin order detail view"""
     order = Order.query.get_or_404(order_id)
@@ -215,8 +265,8 @@ def admin_order_detail(order_id):
                          service=service,
                          plan=plan)
 
-@app.route('/admin/feedbacks/<int:feedback_id>')
 @admin_required
+@read_only
 def admin_feedback_detail(feedback_id):
     """Admin feedback detail view"""
     feedback = Feedback.query.get_or_404(feedback_id)
@@ -0,0 +1,116 @@
+"""
+Admin search over orders and feedback
+Substring searches are served by trigram indexes: pg_trgm GIN indexes on
+PostgreSQL and FTS5 trigram tables on SQLite. Full email addresses and phone
+numbers take an exact-match path on their own indexes instead.
+"""
+
+import re
+from sqlalchemy import event, inspect, DDL
+from app import db
+from models import Order, Feedback
+
+ORDER_SEARCH_COLUMNS = ('customer_name', 'customer_email', 'service_type')
+FEEDBACK_SEARCH_COLUMNS = ('name', 'email', 'subject', 'message')
+
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+# Phone numbers start with +, a trunk 0 or an area code in parentheses, so
+# dates (2024-01-15) and bare ids (12345678) stay text searches
+_PHONE_RE = re.compile(r'^[+0(][\d\s().-]{7,24}$')
+PHONE_DIGITS = (9, 15)
+
+# Trigram indexes cannot serve terms shorter than one trigram
+MIN_TRIGRAM_TERM = 3
+
+_fts_tables_present = {}
+
+def order_search_filter(term):
+    """Filter clause for the admin order search box"""
+    term = term.strip()
+    if _EMAIL_RE.match(term):
+        return db.func.lower(Order.customer_email) == term.lower()
+    if looks_like_phone(term):
+        digits = re.sub(r'\D', '', term)
+        exact = Order.customer_phone.in_({term, digits})
+        # A number that is no stored phone may still be part of a name or email
+        if db.session.query(Order.id).filter(exact).limit(1).first() is not None:
+            return exact
+    return _substring_filter(Order, ORDER_SEARCH_COLUMNS, 'order_trgm', term)
+
+def looks_like_phone(term):
+    """Whether a search term should be looked up as a phone number"""
+    digits = sum(char.isdigit() for char in term)
+    return bool(_PHONE_RE.match(term)) and PHONE_DIGITS[0] <= digits <= PHONE_DIGITS[1]
+
+def feedback_search_filter(term):
+    """Filter clause for the admin feedback search box"""
+    term = term.strip()
+    if _EMAIL_RE.match(term):
+        return db.func.lower(Feedback.email) == term.lower()
+    return _substring_filter(Feedback, FEEDBACK_SEARCH_COLUMNS, 'feedback_trgm', term)
+
+def _substring_filter(model, columns, fts_table, term):
+    # On PostgreSQL the pg_trgm GIN indexes serve ILIKE '%term%' directly
+    if len(term) >= MIN_TRIGRAM_TERM and _has_fts_table(fts_table):
+        phrase = '"' + term.replace('"', '""') + '"'
+        matches = db.select(db.literal_column('rowid')).select_from(db.table(fts_table)).where(
+            db.text(f'{fts_table} MATCH :phrase').bindparams(phrase=phrase))
+        return model.id.in_(matches)
+    return db.or_(*(getattr(model, column).icontains(term, autoescape=True) for column in columns))
+
+def _has_fts_table(name):
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+    key = (engine.url, name)
+    if key not in _fts_tables_present:
+        _fts_tables_present[key] = inspect(engine).has_table(name)
+    return _fts_tables_present[key]
+
+
+# Exact-match lookups
+db.Index('ix_order_customer_email_lower', db.func.lower(Order.customer_email))
+db.Index('ix_order_customer_phone', Order.customer_phone)
+db.Index('ix_feedback_email_lower', db.func.lower(Feedback.email))
+
+# PostgreSQL: pg_trgm GIN indexes per searchable column
+event.listen(db.metadata, 'before_create', DDL(
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+for _model, _columns in ((Order, ORDER_SEARCH_COLUMNS), (Feedback, FEEDBACK_SEARCH_COLUMNS)):
+    for _column in _columns:
+        db.Index(f'ix_{_model.__tablename__}_{_column}_trgm', getattr(_model, _column),
+                 postgresql_using='gin',
+                 postgresql_ops={_column: 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+
+# SQLite: external-content FTS5 trigram tables kept in sync by triggers
+def _sqlite_trigram_listener(table, fts_table, columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    delete = f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    insert = f'INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});'
+    statements = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column_list}, "
+        f"content='{table}', content_rowid='id', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON "{table}" BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON "{table}" BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON "{table}" '
+        f'BEGIN {delete} {insert} END',
+    )
+
+    def create(target, connection, **kw):
+        if connection.dialect.name != 'sqlite':
+            return
+        # schema.upgrade_schema() replays this hook on every migration; only a
+        # new index needs filling from the existing rows
+        existed = inspect(connection).has_table(fts_table)
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+        if not existed:
+            connection.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    return create
+
+for _model, _columns, _fts_table in ((Order, ORDER_SEARCH_COLUMNS, 'order_trgm'),
+                                     (Feedback, FEEDBACK_SEARCH_COLUMNS, 'feedback_trgm')):
+    event.listen(_model.__table__, 'after_create',
+                 _sqlite_trigram_listener(_model.__tablename__, _fts_table, _columns))
@@ -0,0 +1,59 @@
+"""
+URL rules of the admin pages for UEHer application
+The rules are registered at startup, but admin.py (and what only it needs:
+exports and analytics) is imported by the first request that reaches an admin
+page, so a worker that only serves public pages never loads it. The bulk
+importer is loaded at boot for `flask import-orders`; it is cheap, since
+email_validator is only imported by the first import that validates emails.
+"""
+
+from werkzeug.utils import import_string
+from app import app
+
+# (rule, view in admin.py, methods)
+ADMIN_RULES = [
+    ('/admin/login', 'admin_login', ['GET', 'POST']),
+    ('/admin/logout', 'admin_logout', None),
+    ('/admin', 'admin_dashboard', None),
+    ('/admin/dashboard', 'admin_dashboard', None),
+    ('/admin/orders', 'admin_orders', None),
+    ('/admin/orders/<int:order_id>', 'admin_order_detail', None),
+    ('/admin/orders/<int:order_id>/status', 'update_order_status', ['POST']),
+    ('/admin/orders/<int:order_id>/update_status', 'update_order_status', ['POST']),
+    ('/admin/orders/export.<any(csv, jsonl):fmt>', 'export_orders', None),
+    ('/admin/orders/import', 'import_orders_upload', ['POST']),
+    ('/admin/feedbacks', 'admin_feedbacks', None),
+    ('/admin/feedbacks/<int:feedback_id>', 'admin_feedback_detail', None),
+    ('/admin/feedbacks/export.<any(csv, jsonl):fmt>', 'export_feedbacks', None),
+    ('/admin/feedbacks/<int:feedback_id>/status', 'update_feedback_status', ['POST']),
+    ('/admin/feedbacks/<int:feedback_id>/process', 'process_feedback', ['POST']),
+    ('/admin/cache', 'admin_cache_stats', None),
+    ('/admin/analytics/timeseries', 'analytics_timeseries', None),
+    ('/admin/analytics/cohorts', 'analytics_cohorts', None),
+]
+
+class LazyView:
+    """View function imported from import_name on its first call"""
+
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__name__ = import_name.rsplit('.', 1)[-1]
+        self._view = None
+
+    def load(self):
+        if self._view is None:
+            self._view = import_string(self.import_name)
+        return self._view
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+def load_views():
+    """Import admin.py now (e.g. before forking workers)"""
+    for view in _views.values():
+        view.load()
+
+_views = {}
+for rule, endpoint, methods in ADMIN_RULES:
+    view = _views.setdefault(endpoint, LazyView(f'admin.{endpoint}'))
+    app.add_url_rule(rule, endpoint, view_func=view, methods=methods)
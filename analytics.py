@@ -0,0 +1,206 @@
+"""
+Order analytics for the admin API
+Order counts, revenue and status breakdowns are bucketed by day, week or month
+from the daily rollups, optionally split by service or plan. Each period is
+aggregated once and cached: closed periods for ANALYTICS_CLOSED_TTL, or until an
+order change in this worker touches one of their days, so a request over a
+year of orders mostly recomputes the current period. The TTL bounds how long
+changes committed by other workers (status updates, imports) go unseen.
+"""
+
+from datetime import date, datetime, timedelta
+from app import app, db
+from cache import TTLCache
+from rollups import rollups_changed, rollup_rows
+
+_numpy = None
+
+def _np():
+    """numpy when installed (see the "analytics" extra), imported on first use; else False"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+BUCKETS = ('day', 'week', 'month')
+DIMENSIONS = ('service_type', 'plan_type')
+STATUSES = ('pending', 'in_progress', 'completed')
+METRICS = ('orders', 'revenue') + STATUSES
+DEFAULT_SPAN_DAYS = {'day': 30, 'week': 182, 'month': 365}
+MAX_PERIODS = 400
+
+# Closed periods use the default ttl; the open one is stored with ANALYTICS_CACHE_TTL
+_period_cache = TTLCache(ttl=app.config['ANALYTICS_CLOSED_TTL'], maxsize=10000)
+
+def period_start(day, bucket):
+    """First day of the day/week/month period containing day (weeks start on Monday)"""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_period(start, bucket):
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+def periods(start, end, bucket):
+    """Start dates of every period overlapping [start, end]"""
+    current, starts = period_start(start, bucket), []
+    while current <= end:
+        starts.append(current)
+        current = next_period(current, bucket)
+    return starts
+
+def _sums(index, weights, size):
+    """Total of weights per index value in range(size)"""
+    np = _np()
+    if np:
+        return np.bincount(np.asarray(index, dtype=np.intp),
+                           weights=np.asarray(weights, dtype=float), minlength=size).tolist()
+    totals = [0.0] * size
+    for position, weight in zip(index, weights):
+        totals[position] += weight
+    return totals
+
+def _aggregate(bucket, starts, dimension):
+    """Metrics per group for each period start, from one range scan of the rollups"""
+    rollup = rollup_rows().c
+    keys = [rollup.day, rollup.status] + ([getattr(rollup, dimension)] if dimension else [])
+    # Let the database fold away the dimension that is not asked for
+    rows = db.session.query(
+        rollup.day, rollup.status, db.func.sum(rollup.order_count), db.func.sum(rollup.revenue),
+        *keys[2:],
+    ).filter(rollup.day >= starts[0], rollup.day < next_period(starts[-1], bucket)) \
+        .group_by(*keys).all()
+
+    # Columnar slices: period and group codes plus the values to sum
+    period_index = {start: i for i, start in enumerate(starts)}
+    group_index, period_codes, group_codes, statuses, counts, revenue = {}, [], [], [], [], []
+    for row in rows:
+        position = period_index.get(period_start(row[0], bucket))
+        if position is None:
+            continue
+        period_codes.append(position)
+        group_codes.append(group_index.setdefault(row[4] if dimension else 'all', len(group_index)))
+        statuses.append(row[1])
+        counts.append(row[2])
+        revenue.append(row[3])
+
+    width = len(group_index) or 1
+    size = len(starts) * width
+    flat = [p * width + g for p, g in zip(period_codes, group_codes)]
+    sums = {'orders': _sums(flat, counts, size), 'revenue': _sums(flat, revenue, size)}
+    for status in STATUSES:
+        sums[status] = _sums(flat, [c if s == status else 0 for s, c in zip(statuses, counts)], size)
+
+    results = {}
+    for start, p in period_index.items():
+        groups = {}
+        for name, g in group_index.items():
+            cell = p * width + g
+            if sums['orders'][cell] or sums['revenue'][cell]:
+                groups[name] = {metric: _metric_value(metric, sums[metric][cell]) for metric in METRICS}
+        results[start] = groups
+    return results
+
+def _metric_value(metric, value):
+    return round(value, 2) if metric == 'revenue' else int(value)
+
+def _totals(groups):
+    totals = dict.fromkeys(METRICS, 0)
+    for metrics in groups.values():
+        for metric in METRICS:
+            totals[metric] += metrics[metric]
+    totals['revenue'] = round(totals['revenue'], 2)
+    return totals
+
+def period_metrics(bucket, starts, dimension=None, today=None):
+    """{start: {group: metrics}} for each period, computing only uncached periods"""
+    today = today or datetime.utcnow().date()
+    results, missing = {}, []
+    for start in starts:
+        cached = _period_cache.get((bucket, start, dimension))
+        if cached is None:
+            missing.append(start)
+        else:
+            results[start] = cached
+    if missing:
+        computed = _aggregate(bucket, missing, dimension)
+        for start in missing:
+            closed = next_period(start, bucket) <= today
+            _period_cache.set((bucket, start, dimension), computed[start],
+                              ttl=None if closed else app.config['ANALYTICS_CACHE_TTL'])
+            results[start] = computed[start]
+    return results
+
+def parse_range(args):
+    """(bucket, start, end, dimension) from request args; raises ValueError"""
+    bucket = args.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    dimension = args.get('by') or None
+    if dimension is not None and dimension not in DIMENSIONS:
+        raise ValueError(f"by must be one of {', '.join(DIMENSIONS)}")
+    try:
+        end = date.fromisoformat(args['end']) if args.get('end') else datetime.utcnow().date()
+        start = date.fromisoformat(args['start']) if args.get('start') \
+            else end - timedelta(days=DEFAULT_SPAN_DAYS[bucket])
+    except ValueError:
+        raise ValueError('start and end must be ISO dates (YYYY-MM-DD)') from None
+    if start > end:
+        raise ValueError('start must not be after end')
+    if len(periods(start, end, bucket)) > MAX_PERIODS:
+        raise ValueError(f'at most {MAX_PERIODS} periods per request; use a wider bucket')
+    return bucket, start, end, dimension
+
+def timeseries(bucket, start, end, dimension=None):
+    """Orders, revenue and status counts per period, optionally split by dimension"""
+    today = datetime.utcnow().date()
+    starts = periods(start, end, bucket)
+    metrics = period_metrics(bucket, starts, dimension, today)
+    series = []
+    for period in starts:
+        point = {'period': period.isoformat(), 'closed': next_period(period, bucket) <= today,
+                 'totals': _totals(metrics[period])}
+        if dimension:
+            point['groups'] = metrics[period]
+        series.append(point)
+    return {'bucket': bucket, 'by': dimension, 'start': start.isoformat(),
+            'end': end.isoformat(), 'series': series}
+
+def cohorts(bucket, start, end):
+    """Orders grouped by the period they were placed in, with their conversion to completed"""
+    starts = periods(start, end, bucket)
+    metrics = period_metrics(bucket, starts)
+    result = []
+    for period in starts:
+        totals = _totals(metrics[period])
+        orders = totals['orders']
+        result.append(dict(
+            {status: totals[status] for status in STATUSES},
+            cohort=period.isoformat(),
+            orders=orders,
+            conversion_rate=round(totals['completed'] / orders * 100, 1) if orders else 0,
+        ))
+    return {'bucket': bucket, 'start': start.isoformat(), 'end': end.isoformat(), 'cohorts': result}
+
+@rollups_changed.connect
+def _drop_changed_periods(sender, days=None):
+    if days is None:
+        _period_cache.clear()
+        return
+    for day in days:
+        for bucket in BUCKETS:
+            for dimension in (None,) + DIMENSIONS:
+                _period_cache.delete((bucket, period_start(day, bucket), dimension))
+
+def analytics_cache_info():
+    return _period_cache.info()
@@ -0,0 +1,195 @@
+"""
+Batched Merkle anchoring of order digests
+Orders without a proof are collected into batches of up to ANCHOR_BATCH_SIZE.
+Each batch gets a Merkle tree and every order stores its inclusion proof. The
+batch is committed first, which claims its orders, then one chain transaction
+anchors the root and is recorded on the batch; a batch whose worker died in
+between is anchored by the next run. /verify checks membership locally against
+the root the chain recorded for the batch.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from sqlalchemy.exc import IntegrityError
+from app import app, db
+from cache import TTLCache
+from models import Order, AnchorBatch, OrderProof
+import merkle
+from orders import order_digest
+
+logger = logging.getLogger(__name__)
+
+class LocalChain:
+    """Stand-in chain that records anchored roots in memory
+
+    With a ledger_path the roots are also appended to a JSON-lines file, so
+    every worker (and tests run in separate processes) see the same ledger.
+    """
+
+    def __init__(self, ledger_path=None):
+        self.ledger_path = ledger_path
+        if ledger_path:
+            os.makedirs(os.path.dirname(os.path.abspath(ledger_path)), exist_ok=True)
+        self._roots = {}
+        self._lock = threading.Lock()
+
+    def anchor(self, root):
+        """Publish a Merkle root and return its transaction id"""
+        tx_id = '0x' + hashlib.sha256(f'{root}{time.time_ns()}'.encode()).hexdigest()
+        with self._lock:
+            self._roots[tx_id] = root
+            if self.ledger_path:
+                with open(self.ledger_path, 'a', encoding='utf-8') as ledger:
+                    ledger.write(json.dumps({'tx': tx_id, 'root': root}) + '\n')
+        return tx_id
+
+    def get_root(self, tx_id):
+        with self._lock:
+            if tx_id not in self._roots and self.ledger_path:
+                try:
+                    with open(self.ledger_path, encoding='utf-8') as ledger:
+                        for line in ledger:
+                            entry = json.loads(line)
+                            self._roots[entry['tx']] = entry['root']
+                except FileNotFoundError:
+                    pass
+            return self._roots.get(tx_id)
+
+chain = LocalChain(app.config['ANCHOR_LEDGER_PATH'])
+
+def set_chain(new_chain):
+    """Swap the chain client (anything with anchor(root) and get_root(tx_id))"""
+    global chain
+    chain = new_chain
+
+def _pending_orders():
+    return Order.query.outerjoin(OrderProof, OrderProof.order_id == Order.id) \
+        .filter(OrderProof.id.is_(None))
+
+def batch_due():
+    """True once enough orders are waiting, or the oldest has waited a full window"""
+    size = app.config['ANCHOR_BATCH_SIZE']
+    pending = _pending_orders().with_entities(Order.created_at).limit(size).subquery()
+    count, oldest = db.session.query(db.func.count(), db.func.min(pending.c.created_at)).one()
+    # Below size the subquery holds every pending order, so its minimum is the oldest
+    if count >= size:
+        return True
+    window = timedelta(seconds=app.config['ANCHOR_WINDOW'])
+    return oldest is not None and datetime.utcnow() - oldest >= window
+
+def claim_batch():
+    """Commit a batch of pending orders with their proofs, not yet anchored; returns its id
+
+    On PostgreSQL the orders are locked with SKIP LOCKED, so concurrent jobs
+    claim disjoint batches; SQLite has no row locks, so the database write lock
+    is taken up front instead (like BEGIN IMMEDIATE). A job that still loses a
+    race on the unique OrderProof.order_id rolls back, which is harmless
+    because nothing has been published yet.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(db.update(AnchorBatch).where(db.false()).values(chain_tx=None))
+    orders = _pending_orders().order_by(Order.id).limit(app.config['ANCHOR_BATCH_SIZE']) \
+        .with_for_update(skip_locked=True, of=Order).all()
+    if not orders:
+        db.session.rollback()
+        return None
+    levels = merkle.build_levels([bytes.fromhex(order_digest(order)) for order in orders])
+    batch = AnchorBatch(merkle_root=merkle.merkle_root(levels), leaf_count=len(orders))
+    db.session.add(batch)
+    db.session.flush()
+    db.session.add_all([
+        OrderProof(order_id=order.id, batch_id=batch.id, leaf_index=index,
+                   proof=json.dumps(merkle.inclusion_proof(levels, index)))
+        for index, order in enumerate(orders)
+    ])
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another job claimed some of these orders first
+        db.session.rollback()
+        return None
+    return batch.id
+
+def publish_batch(batch_id):
+    """Anchor a claimed batch's root and record the transaction; returns the batch or None
+
+    The no-op UPDATE locks the batch row (the whole database on SQLite) until
+    commit, so a batch is anchored once even when jobs retry it concurrently.
+    """
+    locked = db.session.execute(db.update(AnchorBatch).where(
+        AnchorBatch.id == batch_id, AnchorBatch.chain_tx.is_(None)).values(chain_tx=None))
+    if locked.rowcount != 1:
+        db.session.rollback()
+        return None
+    batch = db.session.get(AnchorBatch, batch_id)
+    batch.chain_tx = chain.anchor(batch.merkle_root)
+    db.session.commit()
+    logger.info('Anchored %d orders under root %s in %s', batch.leaf_count, batch.merkle_root,
+                batch.chain_tx)
+    return batch
+
+def publish_unanchored():
+    """Anchor batches left claimed but unpublished (e.g. by a crashed worker); returns the count"""
+    batch_ids = db.session.scalars(db.select(AnchorBatch.id).where(
+        AnchorBatch.chain_tx.is_(None)).order_by(AnchorBatch.id)).all()
+    # End the read so each publish starts its transaction with the locking write
+    db.session.commit()
+    return sum(publish_batch(batch_id) is not None for batch_id in batch_ids)
+
+def anchor_pending_orders():
+    """Claim, then anchor one batch of unanchored orders; returns the batch or None"""
+    batch_id = claim_batch()
+    return publish_batch(batch_id) if batch_id is not None else None
+
+# Anchored roots never change, so each is fetched from the chain once per worker
+_chain_roots = TTLCache(ttl=0, maxsize=10000)
+
+def anchored_root(chain_tx):
+    """The root the chain recorded for chain_tx, or None when it has no such transaction"""
+    root = _chain_roots.get(chain_tx)
+    if root is None:
+        root = chain.get_root(chain_tx)
+        if root is not None:
+            _chain_roots.set(chain_tx, root)
+    return root
+
+def verify_order_proof(order, session=None):
+    """Return (status, batch): 'verified', 'invalid' or 'pending' when not yet anchored
+
+    The proof must lead to the batch root, and that root must be the one the
+    chain recorded, so rewritten database rows do not verify.
+    """
+    proof = (session or db.session).scalars(order_proof_statement(order)).first()
+    if proof is None or proof.batch.chain_tx is None:
+        return 'pending', None
+    return check_order_proof(order, proof, anchored_root(proof.batch.chain_tx))
+
+def order_proof_statement(order):
+    """Select the order's proof with its batch loaded"""
+    return db.select(OrderProof).options(db.joinedload(OrderProof.batch)) \
+        .filter_by(order_id=order.id).limit(1)
+
+def check_order_proof(order, proof, chain_root):
+    """verify_order_proof() for an anchored proof and the root its chain transaction recorded"""
+    batch = proof.batch
+    if chain_root != batch.merkle_root:
+        logger.warning('Batch %s root does not match chain transaction %s', batch.id, batch.chain_tx)
+        return 'invalid', batch
+    leaf = bytes.fromhex(order_digest(order))
+    if merkle.verify_proof(leaf, json.loads(proof.proof), batch.merkle_root):
+        return 'verified', batch
+    return 'invalid', batch
+
+@app.cli.command('anchor-orders')
+def anchor_orders_command():
+    """Anchor all unanchored orders (run from cron to flush partial batches)."""
+    batches = publish_unanchored()
+    while anchor_pending_orders() is not None:
+        batches += 1
+    click.echo(f'Anchored {batches} batch(es)')
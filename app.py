@@ -1,37 +1,150 @@
 import os
-import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+from logging_config import configure_logging
+from sessions import configure_sessions
+from db_profiles import engine_options, init_engine
+from replicas import RoutingSession, replica_binds
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 
 # Create the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "ueh-dev-secret-key-2024")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# "cookie" (signed cookie) or a server-side store: "memory" (single process) or "redis"
+app.config["SESSION_BACKEND"] = os.environ.get("SESSION_BACKEND", "cookie")
+app.config["SESSION_REDIS_URL"] = os.environ.get("SESSION_REDIS_URL", "redis://localhost:6379/1")
+app.config["SESSION_MEMORY_MAX_ENTRIES"] = int(os.environ.get("SESSION_MEMORY_MAX_ENTRIES", "10000"))
+configure_sessions(app)
+
+# Admin auth: werkzeug hash method for new passwords ("scrypt", "pbkdf2:sha256:600000", ...),
+# threads and queued checks allowed for password verification, and how long a
+# logged-in user's record is reused before it is read again
+app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+app.config["AUTH_HASH_WORKERS"] = int(os.environ.get("AUTH_HASH_WORKERS", "2"))
+app.config["AUTH_HASH_BACKLOG"] = int(os.environ.get("AUTH_HASH_BACKLOG", "8"))
+app.config["AUTH_HASH_TIMEOUT"] = float(os.environ.get("AUTH_HASH_TIMEOUT", "5"))
+app.config["AUTH_USER_CACHE_TTL"] = int(os.environ.get("AUTH_USER_CACHE_TTL", "300"))
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
 # Configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///ueh.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+# ASGI mode (asgi.py): async driver URL when it cannot be derived from DATABASE_URL,
+# and the async pool size, which bounds concurrent queries per worker
+app.config["ASYNC_DATABASE_URL"] = os.environ.get("ASYNC_DATABASE_URL")
+app.config["ASYNC_DB_POOL_SIZE"] = int(os.environ.get("ASYNC_DB_POOL_SIZE", "10"))
+# Engine profile: "sqlite-dev", "postgres-prod", "postgres-pgbouncer" or "auto" (from the URL)
+app.config["DB_PROFILE"] = os.environ.get("DB_PROFILE", "auto")
+# 0 sizes the pool to WEB_THREADS request threads plus TASK_WORKERS job threads
+app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", "0"))
+app.config["DB_MAX_OVERFLOW"] = int(os.environ.get("DB_MAX_OVERFLOW", "5"))
+app.config["DB_POOL_TIMEOUT"] = int(os.environ.get("DB_POOL_TIMEOUT", "10"))
+app.config["DB_STATEMENT_TIMEOUT_MS"] = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "15000"))
+app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+app.config["WEB_THREADS"] = int(os.environ.get("WEB_THREADS", "1"))
+# Comma-separated replica URLs for @read_only views; after a write the client
+# reads from the primary for REPLICA_STICKY_SECONDS
+app.config["DATABASE_REPLICA_URLS"] = [url.strip() for url in
+                                       os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+app.config["REPLICA_STICKY_SECONDS"] = int(os.environ.get("REPLICA_STICKY_SECONDS", "10"))
+app.config["SQLALCHEMY_BINDS"] = replica_binds(app.config["DATABASE_REPLICA_URLS"])
+
+# Seconds the homepage stats may be served from the per-worker cache
+app.config["STATS_CACHE_TTL"] = int(os.environ.get("STATS_CACHE_TTL", "60"))
+# Seconds a rendered static-content page is reused before re-rendering
+app.config["PAGE_CACHE_TTL"] = int(os.environ.get("PAGE_CACHE_TTL", "300"))
+# Compiled templates shared by the workers on a host (empty dir = Jinja's per-user
+# temp dir), and seconds a {% cache %} fragment is kept (0 = until the catalog changes)
+app.config["JINJA_BYTECODE_CACHE"] = os.environ.get("JINJA_BYTECODE_CACHE", "1") == "1"
+app.config["JINJA_CACHE_DIR"] = os.environ.get("JINJA_CACHE_DIR") or None
+app.config["FRAGMENT_CACHE_TTL"] = int(os.environ.get("FRAGMENT_CACHE_TTL", "0"))
+# "auto" uses PostgreSQL full-text search when available, else the in-process index
+app.config["SEARCH_BACKEND"] = os.environ.get("SEARCH_BACKEND", "auto")
+app.config["SEARCH_INDEX_REFRESH"] = int(os.environ.get("SEARCH_INDEX_REFRESH", "30"))
+
+# Background jobs: "thread" runs them on a per-worker pool, "inline" runs them immediately
+app.config["TASK_BACKEND"] = os.environ.get("TASK_BACKEND", "thread")
+app.config["TASK_WORKERS"] = int(os.environ.get("TASK_WORKERS", "2"))
+
+# Throttling of order and contact POSTs: bucket overrides ("order:ip=20/hour,contact:email=5/hour"),
+# "memory" (per worker) or "redis" (shared, at RATE_LIMIT_REDIS_URL) buckets
+app.config["RATE_LIMIT_ENABLED"] = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+app.config["RATE_LIMITS"] = os.environ.get("RATE_LIMITS", "")
+app.config["RATE_LIMIT_BACKEND"] = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+app.config["RATE_LIMIT_REDIS_URL"] = os.environ.get("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+app.config["RATE_LIMIT_MAX_KEYS"] = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Orders are anchored in Merkle batches of up to ANCHOR_BATCH_SIZE, at least
+# every ANCHOR_WINDOW seconds while orders keep arriving. The local chain's
+# ledger file must be shared by every worker that verifies orders.
+app.config["ANCHOR_BATCH_SIZE"] = int(os.environ.get("ANCHOR_BATCH_SIZE", "256"))
+app.config["ANCHOR_WINDOW"] = int(os.environ.get("ANCHOR_WINDOW", "60"))
+app.config["ANCHOR_LEDGER_PATH"] = os.environ.get("ANCHOR_LEDGER_PATH") or \
+    os.path.join(app.instance_path, "anchor-ledger.jsonl")
+
+# Order confirmation emails are only sent when SMTP_HOST is set
+app.config["SMTP_HOST"] = os.environ.get("SMTP_HOST")
+app.config["SMTP_PORT"] = int(os.environ.get("SMTP_PORT", "25"))
+app.config["MAIL_SENDER"] = os.environ.get("MAIL_SENDER", "no-reply@ueher.vn")
+
+# Order writes append rollup deltas; each worker folds them into the daily rollups
+# at most every ROLLUP_FOLD_INTERVAL seconds (also `flask fold-rollups`)
+app.config["ROLLUP_FOLD_INTERVAL"] = int(os.environ.get("ROLLUP_FOLD_INTERVAL", "30"))
+
+# Seconds the still-open analytics period is cached, and closed periods: those are
+# dropped at once after a change in this worker, while changes made by other
+# workers, jobs or CLI imports show up within ANALYTICS_CLOSED_TTL
+app.config["ANALYTICS_CACHE_TTL"] = int(os.environ.get("ANALYTICS_CACHE_TTL", "60"))
+app.config["ANALYTICS_CLOSED_TTL"] = int(os.environ.get("ANALYTICS_CLOSED_TTL", "900"))
+
+# Per-request instrumentation: Server-Timing headers, /metrics, N+1 and slow request warnings
+app.config["SERVER_TIMING"] = os.environ.get("SERVER_TIMING", "1") == "1"
+# /metrics answers only "Authorization: Bearer <METRICS_TOKEN>"; unset, it is a 404
+app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
+app.config["N_PLUS_ONE_THRESHOLD"] = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "10"))
+app.config["SLOW_REQUEST_MS"] = int(os.environ.get("SLOW_REQUEST_MS", "500"))
+
+# Logging: root level, per-logger overrides ("sqlalchemy.engine=INFO,werkzeug=WARNING"),
+# "json" or "text" records, and the share of requests that get an access log line
+app.config["LOG_LEVEL"] = os.environ.get("LOG_LEVEL", "INFO")
+app.config["LOG_LEVELS"] = os.environ.get("LOG_LEVELS", "")
+app.config["LOG_FORMAT"] = os.environ.get("LOG_FORMAT", "json")
+app.config["LOG_REQUEST_SAMPLE_RATE"] = float(os.environ.get("LOG_REQUEST_SAMPLE_RATE", "0.01"))
+configure_logging(app)
+
+# Development convenience: run `flask migrate --offline` at startup instead of as a release step
+app.config["AUTO_MIGRATE"] = os.environ.get("AUTO_MIGRATE", "0") == "1"
 
 # Initialize the app with the extension
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
 db.init_app(app)
 
 with app.app_context():
-    # Import models to ensure tables are created
+    for engine in db.engines.values():
+        init_engine(engine, app.config)
+    # Import models so the mappers and their DDL hooks are set up; tables and
+    # indexes are created by `flask migrate`, not at boot
     import models  # noqa: F401
-    db.create_all()
+    import search  # noqa: F401  (registers the PostgreSQL search index DDL)
+    import admin_search  # noqa: F401  (registers the trigram index DDL)
+    import rollups  # noqa: F401  (keeps OrderDailyRollup in step with Order writes)
 
 # Import routes after app creation
+import templating  # noqa: F401  (bytecode cache and {% cache %} fragments)
 import routes  # noqa: F401
+import auth  # noqa: F401  (login manager, registers `flask create-admin`)
+import admin_urls  # noqa: F401  (admin views are imported by their first request)
+import bulk  # noqa: F401  (registers `flask import-orders`)
+import schema  # noqa: F401  (registers `flask migrate`)
+import anchoring  # noqa: F401  (registers `flask anchor-orders`)
+import instrumentation  # noqa: F401  (Server-Timing headers and /metrics)
+
+if app.config["AUTO_MIGRATE"]:
+    with app.app_context():
+        schema.upgrade_schema(online=False)
+        rollups.rebuild_if_empty()
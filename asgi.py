@@ -0,0 +1,219 @@
+"""
+ASGI entry point for UEHer application
+
+    uvicorn asgi:application --workers 2
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+
+The hot read routes (index, blog_post, verify_order, search) are served by
+async views that query through an asyncpg/aiosqlite engine, so one worker
+keeps serving requests while others wait on the database. Everything else,
+including the not-found and redirect branches of those routes, goes to the
+unchanged Flask app through asgiref's WsgiToAsgi. `gunicorn main:app` keeps
+working as before. Needs the "asgi" extra: pip install '.[asgi]'
+"""
+
+import asyncio
+import copy
+import io
+import random
+import sys
+from flask import render_template, request, request_started, request_finished
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+except ImportError as exc:  # pragma: no cover - depends on the installed extras
+    raise ImportError("The ASGI mode needs the 'asgi' extra: pip install '.[asgi]'") from exc
+
+import search as search_engine
+from anchoring import anchored_root, check_order_proof, order_proof_statement
+from app import app, db
+from data_store import get_cached_stats_async
+from db_profiles import async_engine_options, async_url, init_engine
+from models import BlogPost, Order
+from replicas import REPLICA_PREFIX, pinned_to_primary
+
+wsgi_application = WsgiToAsgi(app)
+
+# The async views build their request context directly, so they apply the
+# app's ProxyFix settings to the environ themselves
+_proxy_fix = None
+if isinstance(app.wsgi_app, ProxyFix):
+    _proxy_fix = copy.copy(app.wsgi_app)
+    _proxy_fix.app = lambda environ, start_response: environ
+
+_engines = {}
+
+def _engine(name):
+    """Async engine for the primary (None) or a replica bind, created per process"""
+    engine = _engines.get(name)
+    if engine is None:
+        config = app.config
+        url = config['SQLALCHEMY_BINDS'][name] if name else \
+            config['ASYNC_DATABASE_URL'] or config['SQLALCHEMY_DATABASE_URI']
+        engine = create_async_engine(async_url(url), **async_engine_options(config))
+        init_engine(engine.sync_engine, config)
+        _engines[name] = engine
+    return engine
+
+def _session():
+    """AsyncSession on one replica per request unless the client just wrote"""
+    replicas = [name for name in app.config['SQLALCHEMY_BINDS'] if name.startswith(REPLICA_PREFIX)]
+    name = random.choice(replicas) if replicas and not pinned_to_primary() else None
+    return AsyncSession(_engine(name), expire_on_commit=False)
+
+async def dispose_engines():
+    """Close pooled async connections (lifespan shutdown)"""
+    while _engines:
+        _, engine = _engines.popitem()
+        await engine.dispose()
+
+
+# Async views. Returning None hands the request to the Flask view instead.
+async def index(session):
+    """Homepage with hero section, stats, and video demo"""
+    stats = await get_cached_stats_async(session)
+    return render_template('index.html', stats=stats)
+
+async def verify_order(session, tx_hash):
+    """Order verification page"""
+    order = await session.scalar(db.select(Order).filter_by(tx_hash=tx_hash).limit(1))
+    if not order:
+        return None
+    proof = await session.scalar(order_proof_statement(order))
+    if proof is None or proof.batch.chain_tx is None:
+        anchor_status, anchor_batch = 'pending', None
+    else:
+        # The chain client may read a ledger file or call a node; keep it off the event loop
+        chain_root = await asyncio.to_thread(anchored_root, proof.batch.chain_tx)
+        anchor_status, anchor_batch = check_order_proof(order, proof, chain_root)
+    return render_template('verify.html', order=order,
+                           anchor_status=anchor_status, anchor_batch=anchor_batch)
+
+async def blog_post(session, slug):
+    """Individual blog post page"""
+    post = await session.scalar(
+        db.select(BlogPost).filter_by(slug=slug, published=True).limit(1))
+    if post is None:
+        return None
+    return render_template('blog_post.html', post=post)
+
+async def search(session):
+    """Search functionality"""
+    query = request.args.get('q', '')
+    if not query:
+        return None
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = 10
+
+    if search_engine.use_postgres():
+        count, statement = search_engine.postgres_blog_statements(query, page, per_page)
+        total = await session.scalar(count)
+        posts = (await session.scalars(statement)).all()
+    else:
+        # The in-process index syncs under a thread lock, so it stays off the event loop
+        ranked = await asyncio.to_thread(search_engine.rank_blog_posts, query)
+        ids = search_engine.page_ids(ranked, page, per_page)
+        by_id = {post.id: post for post in await session.scalars(
+            db.select(BlogPost).where(BlogPost.id.in_(ids)))} if ids else {}
+        posts, total = [by_id[post_id] for post_id in ids if post_id in by_id], len(ranked)
+
+    results = search_engine.SearchResults(posts, search_engine.search_catalog(query),
+                                          total, page, per_page)
+    return render_template('search_results.html',
+                           query=query,
+                           blog_results=results.blog_results,
+                           catalog_results=results.catalog_results,
+                           results=results)
+
+ASYNC_VIEWS = {
+    'index': index,
+    'verify_order': verify_order,
+    'blog_post': blog_post,
+    'search': search,
+}
+
+
+def _environ(scope):
+    """WSGI environ for a bodyless ASGI http request"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        if key in environ:
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        environ[key] = value
+    return _proxy_fix(environ, None) if _proxy_fix else environ
+
+async def _dispatch(view, environ, view_args):
+    """Run an async view the way Flask runs a request; None falls back to Flask"""
+    with app.request_context(environ):
+        try:
+            try:
+                request_started.send(app)
+                rv = app.preprocess_request()
+                if rv is None:
+                    async with _session() as session:
+                        rv = await view(session, **view_args)
+                    if rv is None:
+                        return None
+            except Exception as exc:
+                rv = app.handle_user_exception(exc)
+            response = app.process_response(app.make_response(rv))
+            request_finished.send(app, response=response)
+        except Exception as exc:
+            response = app.handle_exception(exc)
+        return response
+
+async def _send_response(send, response):
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+               for name, value in response.headers.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': response.get_data()})
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await dispose_engines()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI callable: async views for the hot routes, Flask for the rest"""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        environ = _environ(scope)
+        try:
+            endpoint, view_args = app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            endpoint = None
+        view = ASYNC_VIEWS.get(endpoint)
+        if view is not None:
+            response = await _dispatch(view, environ, view_args)
+            if response is not None:
+                return await _send_response(send, response)
+    return await wsgi_application(scope, receive, send)
@@ -0,0 +1,162 @@
+"""
+Admin authentication for UEHer application
+Logins are checked against models.User with flask_login. Password hashes use
+PASSWORD_HASH_METHOD and are upgraded on the next login when it changes.
+Hash checks run on a small thread pool (AUTH_HASH_WORKERS) with a bounded
+backlog, so a burst of login attempts is refused quickly instead of tying up
+every request thread. The user loader serves requests from a per-worker cache
+of SessionUser snapshots rather than querying User on each request.
+"""
+
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+import click
+from flask_login import LoginManager, UserMixin, current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.security import check_password_hash, generate_password_hash
+import metrics
+from app import app, db
+from cache import TTLCache
+from models import User
+
+logger = logging.getLogger(__name__)
+
+LOGINS = metrics.counter('ueher_admin_logins_total', 'Admin login attempts by outcome', ('result',))
+
+login_manager = LoginManager(app)
+login_manager.login_view = 'admin_login'
+login_manager.login_message = 'Vui lòng đăng nhập để truy cập trang quản trị.'
+login_manager.login_message_category = 'error'
+
+class VerifierBusy(Exception):
+    """Too many password checks are already running or queued"""
+
+@dataclass(frozen=True)
+class SessionUser(UserMixin):
+    """What a request needs to know about the logged-in user"""
+    id: int
+    username: str
+    is_admin: bool
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, bool(user.is_admin))
+
+_user_cache = TTLCache(ttl=app.config['AUTH_USER_CACHE_TTL'], maxsize=10000)
+
+def _load_user(user_id):
+    user = db.session.get(User, user_id)
+    return SessionUser.from_user(user) if user is not None else None
+
+@login_manager.user_loader
+def load_user(user_id):
+    """SessionUser for the id stored in the session, cached per worker"""
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return None
+    return _user_cache.get_or_set(user_id, lambda: _load_user(user_id))
+
+def user_cache_info():
+    return _user_cache.info()
+
+# Drop cached snapshots of users changed in this worker once the change commits
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context):
+    changed = session.info.setdefault('auth_changed_users', set())
+    changed.update(obj.id for obj in session.dirty | session.deleted if isinstance(obj, User))
+
+@event.listens_for(Session, 'after_commit')
+def _drop_changed_users(session):
+    for user_id in session.info.pop('auth_changed_users', ()):
+        _user_cache.delete(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_user_changes(session):
+    session.info.pop('auth_changed_users', None)
+
+
+_verifier = ThreadPoolExecutor(max_workers=app.config['AUTH_HASH_WORKERS'],
+                               thread_name_prefix='ueh-auth')
+_verifier_slots = threading.BoundedSemaphore(app.config['AUTH_HASH_WORKERS'] +
+                                             app.config['AUTH_HASH_BACKLOG'])
+
+@functools.lru_cache(maxsize=None)
+def _hash_prefix(method):
+    # werkzeug fills in default parameters, e.g. "scrypt" -> "scrypt:32768:8:1"
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+@functools.lru_cache(maxsize=None)
+def _dummy_hash(method):
+    return generate_password_hash('not-a-password', method=method)
+
+def needs_rehash(password_hash):
+    return password_hash.split('$', 1)[0] != _hash_prefix(app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(password_hash, password):
+    """check_password_hash on the verifier pool; raises VerifierBusy when it is full"""
+    if not _verifier_slots.acquire(blocking=False):
+        LOGINS.inc(result='busy')
+        logger.warning('Password verifier saturated, refusing login attempt')
+        raise VerifierBusy()
+    try:
+        future = _verifier.submit(check_password_hash, password_hash, password)
+    except BaseException:
+        _verifier_slots.release()
+        raise
+    future.add_done_callback(lambda _: _verifier_slots.release())
+    try:
+        return future.result(timeout=app.config['AUTH_HASH_TIMEOUT'])
+    except FutureTimeoutError:
+        LOGINS.inc(result='busy')
+        raise VerifierBusy() from None
+
+def authenticate(username, password):
+    """SessionUser for valid admin credentials, else None; may raise VerifierBusy"""
+    user = User.query.filter_by(username=username).first() if username else None
+    # Unknown users cost a hash check too, so timing does not reveal usernames
+    password_hash = user.password_hash if user is not None and user.password_hash \
+        else _dummy_hash(app.config['PASSWORD_HASH_METHOD'])
+    valid = verify_password(password_hash, password or '')
+    if user is None or not valid or not user.is_admin:
+        LOGINS.inc(result='failure')
+        return None
+    LOGINS.inc(result='success')
+    if needs_rehash(password_hash):
+        user.set_password(password)
+        db.session.commit()
+    return SessionUser.from_user(user)
+
+def admin_required(f):
+    """Decorator to require a logged-in admin"""
+    @functools.wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or not current_user.is_admin:
+            return login_manager.unauthorized()
+        return f(*args, **kwargs)
+    return decorated_function
+
+def create_admin(username, email, password):
+    """Create an admin user, or reset an existing user's password and make it admin"""
+    user = User.query.filter_by(username=username).first()
+    created = user is None
+    if created:
+        user = User(username=username, email=email)
+        db.session.add(user)
+    user.is_admin = True
+    user.set_password(password)
+    db.session.commit()
+    return user, created
+
+@app.cli.command('create-admin')
+@click.option('--username', prompt=True)
+@click.option('--email', prompt=True)
+@click.password_option()
+def create_admin_command(username, email, password):
+    """Create an admin account (or reset its password)."""
+    user, created = create_admin(username, email, password)
+    click.echo(f"{'Created' if created else 'Updated'} admin '{user.username}'")
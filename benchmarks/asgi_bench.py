@@ -0,0 +1,102 @@
+"""
+Requests per second per worker: sync gunicorn vs the ASGI mode
+
+    python -m benchmarks.asgi_bench [--concurrency 64] [--duration 5] [--threads 4]
+                                    [--routes index search ...] [--save FILE]
+
+Seeds DATABASE_URL (a temporary SQLite file when unset), then loads the routes
+asgi.py serves asynchronously against one worker of each server in turn:
+`gunicorn main:app` with --threads request threads, and
+`uvicorn asgi:application`. With a single worker each, throughput is
+requests per second per worker. Needs gunicorn and the "asgi" extra.
+"""
+
+import argparse
+import logging
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'asgi_bench.db')
+os.environ['SERVER_TIMING'] = '1'
+
+from app import app, db  # noqa: E402
+from benchmarks import seed  # noqa: E402
+from benchmarks.load_test import (Target, run_scenario, start_gunicorn, start_server,  # noqa: E402
+                                  free_port)
+from benchmarks.reporting import print_table, save_results  # noqa: E402
+from benchmarks.scenarios import scenarios  # noqa: E402
+
+# Scenarios that exercise the async views in asgi.py
+ASYNC_ROUTES = ('index', 'blog_post', 'search', 'verify_order')
+
+def start_uvicorn(port):
+    return start_server('uvicorn', [sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1',
+                                    '--port', str(port), '--workers', '1', '--log-level', 'warning',
+                                    '--no-access-log', 'asgi:application'], port)
+
+def run_server(start, selected, concurrency, duration):
+    port = free_port()
+    process = start(port)
+    try:
+        target = Target(f'http://127.0.0.1:{port}')
+        return {scenario.name: run_scenario(target, scenario, concurrency, duration)
+                for scenario in selected}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per route and server')
+    parser.add_argument('--threads', type=int, default=4, help='Request threads of the gunicorn worker')
+    parser.add_argument('--routes', nargs='*', help='Only scenarios whose name contains one of these')
+    parser.add_argument('--save')
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--feedbacks', type=int, default=50000)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with app.app_context():
+        print(f'Database: {db.engine.url.render_as_string(hide_password=True)}')
+        dialect = db.engine.dialect.name
+        seeded = seed.seed(args.orders, args.feedbacks, args.posts)
+        if seeded:
+            print(f'Seeded {", ".join(seeded)}')
+        fixture = seed.fixture()
+    selected = [scenario for scenario in scenarios(fixture)
+                if scenario.name.split()[0] in ASYNC_ROUTES
+                and (not args.routes or any(part in scenario.name for part in args.routes))]
+
+    servers = {
+        f'gunicorn sync (1 worker x {args.threads} threads)':
+            lambda port: start_gunicorn(1, args.threads, port),
+        'uvicorn asgi (1 worker)': start_uvicorn,
+    }
+    results = {}
+    for name, start in servers.items():
+        results[name] = run_server(start, selected, args.concurrency, args.duration)
+        print_table(results[name], f'{name}, concurrency {args.concurrency}, {args.duration:g}s per route')
+
+    sync_rows, async_rows = results.values()
+    print(f'\n=== req/s per worker ===\n{"route":<32} {"sync":>8} {"asgi":>8} {"ratio":>7}')
+    for route, row in sync_rows.items():
+        sync_rps, async_rps = row['throughput'], async_rows[route]['throughput']
+        ratio = f'{async_rps / sync_rps:.2f}x' if sync_rps else '-'
+        print(f'{route:<32} {sync_rps:>8.1f} {async_rps:>8.1f} {ratio:>7}')
+
+    if args.save:
+        save_results(args.save, results, {
+            'driver': 'asgi_bench', 'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'database': dialect, 'threads': args.threads,
+            'concurrency': args.concurrency, 'duration': args.duration,
+        })
+        print(f'\nSaved results to {args.save}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Worker boot to first response
+
+    python -m benchmarks.boot_time [--runs 5] [--paths / /admin/login]
+                                   [--servers gunicorn uvicorn] [--gunicorn-config FILE]
+                                   [--baseline FILE] [--save FILE] [--tolerance 0.25]
+
+Migrates DATABASE_URL (a temporary SQLite file when unset) with
+`flask --app main migrate`, then starts each server --runs times with one
+worker and times, from spawning the process, the first response to each of
+--paths in turn: the first path measures the cold start, later ones the extra
+cost of routes whose modules load on demand (the admin pages). Any HTTP status
+counts as a response. Gunicorn runs with benchmarks/gunicorn.conf.py unless
+--gunicorn-config names another settings file. Results use the benchmarks.reporting format, so a saved
+run can be the baseline of the next.
+"""
+
+import argparse
+import http.client
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# The app is only imported by the servers under test, never by this process
+from benchmarks.reporting import summarize, print_table, load_baseline, save_results, compare
+
+GUNICORN_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+# Server command lines by name, given the port and the gunicorn settings file
+SERVERS = {
+    'gunicorn': lambda port, config: [sys.executable, '-m', 'gunicorn', '--config', config,
+                                      '--bind', f'127.0.0.1:{port}', '--workers', '1',
+                                      '--log-level', 'warning', 'main:app'],
+    'uvicorn': lambda port, config: [sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1',
+                                     '--port', str(port), '--workers', '1', '--log-level', 'warning',
+                                     '--no-access-log', 'asgi:application'],
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _get(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+def first_response(port, path, process, timeout=60):
+    """Status of the first answer to GET path, retrying until the server listens"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited during startup')
+        try:
+            return _get(port, path)
+        except ConnectionRefusedError:
+            time.sleep(0.005)
+    raise RuntimeError(f'no response within {timeout}s')
+
+def boot(command, port, paths):
+    """(milliseconds since the previous response, status) for each path's first request
+
+    A path whose connection fails gets status None; the server is stopped at the
+    first failure, so the remaining paths are not measured.
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(command(port), env=dict(os.environ))
+    responses = []
+    try:
+        for path in paths:
+            try:
+                status = first_response(port, path, process)
+            except (OSError, RuntimeError) as exc:
+                print(f'GET {path}: {exc!r}')
+                responses.append((None, None))
+                break
+            elapsed = (time.perf_counter() - started) * 1000
+            responses.append((elapsed, status))
+            started += elapsed / 1000
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return responses
+
+def measure(server, paths, runs, gunicorn_config=GUNICORN_CONFIG):
+    def command(port):
+        return SERVERS[server](port, gunicorn_config)
+    latencies = {path: [] for path in paths}
+    statuses = {path: [] for path in paths}
+    errors = dict.fromkeys(paths, 0)
+    for _ in range(runs):
+        for path, (elapsed, status) in zip(paths, boot(command, free_port(), paths)):
+            if status is None:
+                errors[path] += 1
+            else:
+                latencies[path].append(elapsed)
+                statuses[path].append(status)
+    return {f'{server} {"boot" if i == 0 else "first"} {path}':
+            summarize(latencies[path], 0, errors=errors[path], statuses=statuses[path])
+            for i, path in enumerate(paths)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--paths', nargs='+', default=['/', '/admin/login'])
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['gunicorn'])
+    parser.add_argument('--gunicorn-config', default=GUNICORN_CONFIG,
+                        help='Gunicorn settings file (default: the plain benchmark settings)')
+    parser.add_argument('--baseline')
+    parser.add_argument('--save')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'boot_time.db')
+    os.environ['AUTO_MIGRATE'] = '0'
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'main', 'migrate'], check=True,
+                   env=dict(os.environ), stdout=subprocess.DEVNULL)
+
+    results = {}
+    for server in args.servers:
+        results.update(measure(server, args.paths, args.runs, args.gunicorn_config))
+    print_table(results, f'boot to first response (ms), {args.runs} run(s), 1 worker')
+    if args.save:
+        save_results(args.save, results, {
+            'driver': 'boot_time', 'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'runs': args.runs, 'paths': args.paths,
+            'gunicorn_config': os.path.relpath(args.gunicorn_config),
+        })
+        print(f'\nSaved results to {args.save}')
+    if args.baseline:
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance, noise_ms=20.0)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print('\nNo regressions against the baseline')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+"""
+Gunicorn settings for the benchmark drivers
+Passed with --config, so a benchmark never picks up the deployment settings in
+the repository's gunicorn.conf.py: no preloading, no worker recycling, and
+workers, threads and the bind address come from the driver's command line.
+This keeps runs comparable with baselines saved before those settings existed;
+pass --gunicorn-config gunicorn.conf.py to measure the deployment settings.
+"""
+
+preload_app = False
+max_requests = 0
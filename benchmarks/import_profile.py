@@ -0,0 +1,102 @@
+"""
+Import-time profile of the application
+
+    python -m benchmarks.import_profile [--module main] [--top 15]
+                                        [--baseline FILE] [--save FILE] [--tolerance 0.25]
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+reports, for every project module, its own import time and the cumulative time
+including what it pulled in, followed by the slowest third-party packages.
+Saved results can be the baseline of a later run; a module regresses when its
+cumulative time grows past the tolerance (and past a 5 ms noise floor).
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def project_modules():
+    """Top-level module names of the application (the .py files in the repository root)"""
+    return {name[:-3] for name in os.listdir(ROOT) if name.endswith('.py')}
+
+def import_times(module):
+    """{module name: (self us, cumulative us)} parsed from -X importtime output"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f'import {module} failed:\n{result.stderr[-2000:]}')
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def profile(module):
+    times = import_times(module)
+    ours = project_modules()
+    results = {name: {'self_ms': round(own / 1000, 1), 'cumulative_ms': round(total / 1000, 1)}
+               for name, (own, total) in times.items() if name in ours}
+    packages = {}
+    for name, (own, _) in times.items():
+        package = name.split('.')[0]
+        if package not in ours and package not in sys.stdlib_module_names and not package.startswith('_'):
+            packages[package] = packages.get(package, 0) + own
+    return results, {name: round(us / 1000, 1) for name, us in packages.items()}
+
+def compare(results, baseline, tolerance=0.25, noise_ms=5.0):
+    """Regression messages for modules whose cumulative import time grew"""
+    regressions = []
+    for name, row in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if row['cumulative_ms'] > before['cumulative_ms'] * (1 + tolerance) \
+                and row['cumulative_ms'] - before['cumulative_ms'] > noise_ms:
+            regressions.append(f'{name}: {row["cumulative_ms"]} ms vs baseline {before["cumulative_ms"]} ms')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--top', type=int, default=15, help='Third-party packages to list')
+    parser.add_argument('--baseline')
+    parser.add_argument('--save')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results, packages = profile(args.module)
+    print(f'\n=== import {args.module}: project modules ===')
+    print(f'{"module":<24} {"self ms":>8} {"cumul ms":>9}')
+    for name, row in sorted(results.items(), key=lambda item: -item[1]['cumulative_ms']):
+        print(f'{name:<24} {row["self_ms"]:>8} {row["cumulative_ms"]:>9}')
+    print('\n=== third-party packages (self time) ===')
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'{name:<24} {ms:>8}')
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {'driver': 'import_profile', 'module': args.module,
+                                'date': datetime.utcnow().isoformat(timespec='seconds'),
+                                'python': platform.python_version()},
+                       'results': results, 'packages': packages}, f, indent=2, sort_keys=True)
+        print(f'\nSaved results to {args.save}')
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print('\nNo regressions against the baseline')
+
+if __name__ == '__main__':
+    main()
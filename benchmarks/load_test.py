@@ -0,0 +1,222 @@
+"""
+Concurrent HTTP load test against gunicorn
+
+    python -m benchmarks.load_test [--workers 2] [--concurrency 16] [--duration 5]
+                                   [--url http://host:port] [--include-writes]
+                                   [--gunicorn-config FILE]
+                                   [--baseline FILE] [--save FILE] [--tolerance 0.25]
+
+Seeds DATABASE_URL (a temporary SQLite file when unset), starts
+`gunicorn main:app` on a free local port (or targets --url), then drives each
+read-only route scenario with --concurrency client threads for --duration
+seconds. Gunicorn runs with benchmarks/gunicorn.conf.py, not the deployment
+settings, unless --gunicorn-config names another file. Reports throughput, p50/p95/p99 latency and queries per request, and
+compares against a baseline like benchmarks.route_bench.
+
+Latency covers the whole response body. Query counts come from Server-Timing,
+which is sent before a streamed body (the exports) fetches its rows, so those
+routes show no count here; benchmarks.route_bench counts them.
+"""
+
+import argparse
+import http.client
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load_test.db')
+os.environ['SERVER_TIMING'] = '1'
+# The write scenarios post the same forms far faster than any client would
+os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+
+from app import app, db  # noqa: E402
+from benchmarks import seed  # noqa: E402
+from benchmarks.reporting import (summarize, queries_from_server_timing, print_table,  # noqa: E402
+                                  load_baseline, save_results, compare)
+from benchmarks.scenarios import scenarios  # noqa: E402
+
+GUNICORN_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(name, command, port):
+    """Run a server command and wait until it accepts connections on port"""
+    process = subprocess.Popen(command, env=dict(os.environ))
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{name} exited during startup')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f'{name} did not start listening within 30s')
+
+def start_gunicorn(workers, threads, port, app_path='main:app', worker_class=None, config=GUNICORN_CONFIG):
+    command = [sys.executable, '-m', 'gunicorn', '--config', config, '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning']
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    return start_server('gunicorn', command + [app_path], port)
+
+class Target:
+    """Host to load, with the admin session cookie once logged in"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.admin_cookie = None
+
+    def request(self, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            response.read()
+            return response
+        finally:
+            connection.close()
+
+    def login(self, username, password):
+        response = self.request('POST', '/admin/login',
+                                body=urlencode({'username': username, 'password': password}),
+                                headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        cookie = response.getheader('Set-Cookie')
+        # A failed login re-renders the form (200) instead of redirecting
+        self.admin_cookie = cookie.split(';', 1)[0] if cookie and response.status == 302 else None
+        return self.admin_cookie is not None
+
+def _scenario_request(target, scenario):
+    headers, body = {}, None
+    if scenario.admin and target.admin_cookie:
+        headers['Cookie'] = target.admin_cookie
+    if scenario.body:
+        body, headers['Content-Type'] = scenario.body, scenario.content_type
+    elif scenario.data:
+        body = urlencode(scenario.data)
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    return target.request(scenario.method, scenario.path, body, headers)
+
+def run_scenario(target, scenario, concurrency, duration):
+    lock = threading.Lock()
+    latencies, queries, statuses = [], [], []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    def worker():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = _scenario_request(target, scenario)
+                status, timing = response.status, response.getheader('Server-Timing')
+                if response.getheader('Content-Length') is None:
+                    timing = None  # streamed: the header predates the row queries
+            except (OSError, http.client.HTTPException):
+                status, timing = 'exception', None
+            elapsed = (time.perf_counter() - started) * 1000
+            count = queries_from_server_timing(timing)
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(status)
+                if status == 'exception' or status >= 500:
+                    errors += 1
+                if count is not None:
+                    queries.append(count)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, queries, errors, statuses)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='Target a running server instead of starting gunicorn')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--gunicorn-config', default=GUNICORN_CONFIG,
+                        help='Gunicorn settings file (default: the plain benchmark settings)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per route')
+    parser.add_argument('--routes', nargs='*', help='Only scenarios whose name contains one of these')
+    parser.add_argument('--include-writes', action='store_true', help='Also load scenarios that write')
+    parser.add_argument('--admin-username', default=os.environ.get('BENCH_ADMIN_USERNAME', 'admin'))
+    parser.add_argument('--admin-password', default=os.environ.get('BENCH_ADMIN_PASSWORD', 'admin123'))
+    parser.add_argument('--baseline')
+    parser.add_argument('--save')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--feedbacks', type=int, default=50000)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with app.app_context():
+        print(f'Database: {db.engine.url.render_as_string(hide_password=True)}')
+        dialect = db.engine.dialect.name
+        if not args.url:
+            seeded = seed.seed(args.orders, args.feedbacks, args.posts)
+            if seeded:
+                print(f'Seeded {", ".join(seeded)}')
+            seed.admin(args.admin_username, args.admin_password)
+        fixture = dict(seed.fixture(), admin_username=args.admin_username,
+                       admin_password=args.admin_password)
+    selected = [scenario for scenario in scenarios(fixture)
+                if (not args.routes or any(part in scenario.name for part in args.routes))
+                and (args.include_writes or not scenario.writes)
+                and scenario.name != 'admin_logout']
+
+    process = None
+    url = args.url
+    if not url:
+        port = free_port()
+        process = start_gunicorn(args.workers, args.threads, port, config=args.gunicorn_config)
+        url = f'http://127.0.0.1:{port}'
+    try:
+        target = Target(url)
+        if not target.login(args.admin_username, args.admin_password):
+            print('Admin login failed; admin routes will measure the login redirect')
+        results = {scenario.name: run_scenario(target, scenario, args.concurrency, args.duration)
+                   for scenario in selected}
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    server = url if args.url else f'gunicorn {args.workers} worker(s) x {args.threads} thread(s)'
+    print_table(results, f'{server}, concurrency {args.concurrency}, {args.duration:g}s per route')
+    if args.save:
+        save_results(args.save, results, {
+            'driver': 'load_test', 'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'database': dialect, 'workers': args.workers,
+            'threads': args.threads, 'concurrency': args.concurrency, 'duration': args.duration,
+            'gunicorn_config': None if args.url else os.path.relpath(args.gunicorn_config),
+        })
+        print(f'\nSaved results to {args.save}')
+    if args.baseline:
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print('\nNo regressions against the baseline')
+
+if __name__ == '__main__':
+    main()
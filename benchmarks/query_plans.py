@@ -0,0 +1,120 @@
+"""
+Query plans for the hot Order/Feedback queries, before and after the model indexes
+
+    python -m benchmarks.query_plans [--orders 50000] [--feedbacks 20000]
+
+Uses DATABASE_URL when set (point it at a scratch PostgreSQL database), else a
+temporary SQLite file. The Order and Feedback indexes are dropped, each query is
+explained and timed, then `schema.create_indexes()` rebuilds them and the same
+queries run again.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'query_plans.db')
+
+from app import app, db  # noqa: E402
+from models import Order, Feedback  # noqa: E402
+import schema  # noqa: E402
+
+STATUSES = ('pending', 'in_progress', 'completed', 'completed', 'completed')
+
+def seed(n_orders, n_feedbacks):
+    start = datetime.utcnow() - timedelta(days=365)
+    rng = random.Random(42)
+    for offset in range(0, n_orders, 5000):
+        db.session.execute(db.insert(Order), [{
+            'customer_name': f'Customer {i}',
+            'customer_email': f'customer{i}@example.com',
+            'service_type': rng.choice(('schedule', 'memes', 'documents', 'other')),
+            'plan_type': rng.choice(('free', 'basic', 'pro', 'team')),
+            'status': rng.choice(STATUSES),
+            'total_amount': rng.choice((0, 99000, 199000, 499000)),
+            'tx_hash': f'0x{i:064x}',
+            'created_at': start + timedelta(seconds=rng.randrange(365 * 86400)),
+        } for i in range(offset, min(offset + 5000, n_orders))])
+    for offset in range(0, n_feedbacks, 5000):
+        db.session.execute(db.insert(Feedback), [{
+            'name': f'Visitor {i}',
+            'email': f'visitor{i}@example.com',
+            'message': 'Feedback message',
+            'is_processed': rng.random() < 0.9,
+            'created_at': start + timedelta(seconds=rng.randrange(365 * 86400)),
+        } for i in range(offset, min(offset + 5000, n_feedbacks))])
+    db.session.commit()
+
+def hot_queries(n_orders):
+    middle = datetime.utcnow() - timedelta(days=180)
+    newest_first = (Order.created_at.desc(), Order.id.desc())
+    return {
+        'verify_order by tx_hash': db.select(Order).where(Order.tx_hash == f'0x{n_orders // 2:064x}'),
+        'admin_orders first page': db.select(Order).order_by(*newest_first).limit(21),
+        'admin_orders pending page': db.select(Order).where(Order.status == 'pending')
+            .order_by(*newest_first).limit(21),
+        'admin_orders keyset page': db.select(Order)
+            .where(db.tuple_(Order.created_at, Order.id) < db.tuple_(middle, n_orders))
+            .order_by(*newest_first).limit(21),
+        'pending count': db.select(db.func.count()).select_from(Order).where(Order.status == 'pending'),
+        'admin_feedbacks unprocessed page': db.select(Feedback).where(Feedback.is_processed == False)  # noqa: E712
+            .order_by(Feedback.created_at.desc(), Feedback.id.desc()).limit(21),
+    }
+
+def explain(connection, statement):
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+    return [row[0] for row in connection.exec_driver_sql('EXPLAIN ' + sql)]
+
+def time_query(connection, statement, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(statement).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def report(label, queries):
+    print(f'\n=== {label} ===')
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('ANALYZE')
+        connection.commit()
+        for name, statement in queries.items():
+            print(f'\n-- {name}: {time_query(connection, statement):.2f} ms (median)')
+            for line in explain(connection, statement):
+                print('   ', line)
+
+def drop_indexes():
+    with db.engine.begin() as connection:
+        for model in (Order, Feedback):
+            for index in model.__table__.indexes:
+                connection.exec_driver_sql(f'DROP INDEX IF EXISTS {index.name}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--feedbacks', type=int, default=20000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f'Database: {db.engine.url.render_as_string(hide_password=True)}')
+        schema.upgrade_schema(online=False)
+        if not db.session.query(Order.id).first():
+            seed(args.orders, args.feedbacks)
+        n_orders = db.session.query(db.func.max(Order.id)).scalar()
+        queries = hot_queries(n_orders)
+
+        drop_indexes()
+        report('before: no indexes', queries)
+        created = schema.create_indexes(online=True)
+        print(f'\nCreated: {", ".join(created)}')
+        report('after: model indexes', queries)
+
+if __name__ == '__main__':
+    main()
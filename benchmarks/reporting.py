@@ -0,0 +1,73 @@
+"""
+Latency summaries and baseline comparison for the benchmark drivers
+Results are dicts keyed by scenario name; a baseline is a results file saved
+by an earlier run. A route regresses when its p95 grows past the tolerance
+(and past a small absolute noise floor) or when it runs more queries.
+"""
+
+import json
+import math
+
+def percentile(samples, q):
+    """Nearest-rank percentile of a list of numbers (q in 0..100)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def summarize(latencies_ms, elapsed_s, queries=(), errors=0, statuses=()):
+    return {
+        'requests': len(latencies_ms),
+        'throughput': round(len(latencies_ms) / elapsed_s, 1) if elapsed_s else 0.0,
+        'p50': round(percentile(latencies_ms, 50), 2),
+        'p95': round(percentile(latencies_ms, 95), 2),
+        'p99': round(percentile(latencies_ms, 99), 2),
+        'queries': round(sum(queries) / len(queries), 1) if queries else None,
+        'errors': errors,
+        'statuses': sorted(set(statuses)),
+    }
+
+def queries_from_server_timing(header):
+    """Query count from the db entry of a Server-Timing header, or None"""
+    for entry in (header or '').split(','):
+        parts = [part.strip() for part in entry.split(';')]
+        if parts[0] == 'db':
+            for part in parts[1:]:
+                if part.startswith('desc='):
+                    return int(part[5:].strip('"').split()[0])
+    return None
+
+def print_table(results, title):
+    print(f'\n=== {title} ===')
+    print(f'{"route":<32} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} '
+          f'{"errors":>6}  status')
+    for name, row in results.items():
+        queries = '-' if row['queries'] is None else row['queries']
+        print(f'{name:<32} {row["throughput"]:>8} {row["p50"]:>8} {row["p95"]:>8} {row["p99"]:>8} '
+              f'{queries:>8} {row["errors"]:>6}  {",".join(map(str, row["statuses"]))}')
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+def save_results(path, results, meta):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+
+def compare(results, baseline, tolerance=0.25, noise_ms=1.0):
+    """Regression messages for routes slower or chattier than the baseline"""
+    regressions = []
+    for name, row in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        limit = before['p95'] * (1 + tolerance)
+        if row['p95'] > limit and row['p95'] - before['p95'] > noise_ms:
+            regressions.append(f'{name}: p95 {row["p95"]} ms vs baseline {before["p95"]} ms '
+                               f'(+{(row["p95"] / before["p95"] - 1) * 100 if before["p95"] else 100:.0f}%)')
+        if row['queries'] is not None and before.get('queries') is not None \
+                and row['queries'] > before['queries']:
+            regressions.append(f'{name}: {row["queries"]} queries/request vs baseline {before["queries"]}')
+        if row['errors'] > before.get('errors', 0):
+            regressions.append(f'{name}: {row["errors"]} errors vs baseline {before.get("errors", 0)}')
+    return regressions
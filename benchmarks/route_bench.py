@@ -0,0 +1,154 @@
+"""
+Per-route micro-benchmarks through the Flask test client
+
+    python -m benchmarks.route_bench [--iterations 200] [--routes admin_orders search ...]
+                                     [--baseline FILE] [--save FILE] [--tolerance 0.25]
+
+Seeds DATABASE_URL (a temporary SQLite file when unset) through benchmarks.seed,
+then requests every route scenario sequentially and reports throughput,
+p50/p95/p99 latency and SQL queries per request. Every response body is read
+in full, and queries are counted until it is, so streamed exports include the
+queries that fetch their rows. With --baseline the run fails when a route
+regressed; --save writes this run as the next baseline.
+
+No baseline is committed: numbers depend on the machine and database. Record
+one on the reference machine before a change and compare after it:
+
+    python -m benchmarks.route_bench --save benchmarks/baseline.json
+    python -m benchmarks.route_bench --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'route_bench.db')
+os.environ['SERVER_TIMING'] = '1'
+# The write scenarios post the same forms far faster than any client would
+os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from app import app, db  # noqa: E402
+from benchmarks import seed  # noqa: E402
+from benchmarks.reporting import summarize, print_table, load_baseline, save_results, compare  # noqa: E402
+from benchmarks.scenarios import scenarios  # noqa: E402
+
+class QueryCounter:
+    """SQL statements run in this process
+
+    Server-Timing is sent before a streamed body fetches its rows, so the
+    requests are counted here, through the body. Statements from other
+    threads (background jobs) are left out, as Server-Timing leaves them out.
+    """
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.count = 0
+
+    def __call__(self, *args):
+        if threading.get_ident() == self.thread:
+            self.count += 1
+
+query_counter = QueryCounter()
+event.listen(Engine, 'after_cursor_execute', query_counter)
+
+def _login(client, admin_id):
+    # What flask_login stores after a successful login, without paying for the hash check
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+
+def _request(client, scenario):
+    if scenario.body:
+        return client.open(scenario.path, method=scenario.method, data=scenario.body,
+                           content_type=scenario.content_type)
+    return client.open(scenario.path, method=scenario.method, data=scenario.data or None)
+
+def run_scenario(scenario, iterations, warmup, admin_id):
+    client = app.test_client()
+    latencies, queries, statuses, errors = [], [], [], 0
+    started_all = None
+    for i in range(warmup + iterations):
+        if scenario.admin:
+            _login(client, admin_id)
+        if i == warmup:
+            started_all = time.perf_counter()
+        started, queries_before = time.perf_counter(), query_counter.count
+        try:
+            response = _request(client, scenario)
+            response.get_data()  # drain streamed bodies
+            status = response.status_code
+        except Exception:
+            status = 'exception'
+        elapsed = (time.perf_counter() - started) * 1000
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        statuses.append(status)
+        if status == 'exception' or status >= 500:
+            errors += 1
+        else:
+            queries.append(query_counter.count - queries_before)
+    return summarize(latencies, time.perf_counter() - started_all, queries, errors, statuses)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--routes', nargs='*', help='Only scenarios whose name contains one of these')
+    parser.add_argument('--skip-writes', action='store_true', help='Leave out scenarios that write')
+    parser.add_argument('--baseline', help='Fail when a route regressed against this results file')
+    parser.add_argument('--save', help='Write the results to this file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 growth (0.25 = 25%%)')
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--feedbacks', type=int, default=50000)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    # Keep per-query debug logging out of the measurements
+    logging.disable(logging.INFO)
+
+    with app.app_context():
+        print(f'Database: {db.engine.url.render_as_string(hide_password=True)}')
+        dialect = db.engine.dialect.name
+        seeded = seed.seed(args.orders, args.feedbacks, args.posts)
+        if seeded:
+            print(f'Seeded {", ".join(seeded)}')
+        credentials = {'admin_username': os.environ.get('BENCH_ADMIN_USERNAME', 'admin'),
+                       'admin_password': os.environ.get('BENCH_ADMIN_PASSWORD', 'admin123')}
+        admin_id = seed.admin(credentials['admin_username'], credentials['admin_password'])
+        selected = [scenario for scenario in scenarios(dict(seed.fixture(), **credentials))
+                    if (not args.routes or any(part in scenario.name for part in args.routes))
+                    and not (args.skip_writes and scenario.writes)]
+
+    results = {}
+    for scenario in selected:
+        iterations = min(scenario.iterations or args.iterations, args.iterations)
+        results[scenario.name] = run_scenario(scenario, iterations, args.warmup, admin_id)
+    print_table(results, f'test client, {args.iterations} iterations per route')
+
+    if args.save:
+        save_results(args.save, results, {
+            'driver': 'route_bench', 'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'database': dialect,
+            'iterations': args.iterations,
+        })
+        print(f'\nSaved results to {args.save}')
+    if args.baseline:
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print('\nNo regressions against the baseline')
+
+if __name__ == '__main__':
+    main()
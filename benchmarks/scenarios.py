@@ -0,0 +1,87 @@
+"""
+Route scenarios shared by the benchmark drivers
+One entry per route in routes.py and admin.py, addressed with ids from the
+seeded database. Scenarios marked as writes insert or update rows and are
+left out of the load test unless asked for.
+"""
+
+from dataclasses import dataclass, field
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    path: str
+    method: str = 'GET'
+    data: dict = field(default_factory=dict)
+    admin: bool = False
+    writes: bool = False
+    iterations: int = 0  # 0: the driver's default
+    body: bytes = b''
+    content_type: str = ''
+
+def _import_body(count=10):
+    lines = [f'{{"customer_name": "Bench {i}", "customer_email": "bench{i}@example.com", '
+             f'"service_type": "memes", "plan_type": "basic", "total_amount": 99000}}'
+             for i in range(count)]
+    return ('\n'.join(lines) + '\n').encode()
+
+def scenarios(fixture):
+    """All route scenarios for the seeded rows described by fixture (see seed.fixture)"""
+    order_id, feedback_id = fixture['order_id'], fixture['feedback_id']
+    order_form = {
+        'step': '3', 'customer_name': 'Bench Customer', 'customer_email': 'bench@example.com',
+        'customer_phone': '0900000000', 'service_type': 'memes', 'plan_type': 'basic',
+        'description': 'Benchmark order', 'total_amount': '99000',
+    }
+    contact_form = {'name': 'Bench', 'email': 'bench@example.com', 'subject': 'Benchmark',
+                    'message': 'Benchmark feedback'}
+    return [
+        Scenario('index', '/'),
+        Scenario('about', '/about'),
+        Scenario('services', '/services'),
+        Scenario('services filtered', '/services?filter=memes'),
+        Scenario('pricing', '/pricing'),
+        Scenario('faq', '/faq'),
+        Scenario('blog', '/blog'),
+        Scenario('blog_post', f"/blog/{fixture['slug']}"),
+        Scenario('search', '/search?q=thi%20UEH'),
+        Scenario('search page 2', '/search?q=sinh%20vien&page=2'),
+        Scenario('order form', '/order'),
+        Scenario('order submit', '/order', method='POST', data=order_form, writes=True),
+        Scenario('verify_order', f"/verify/{fixture['tx_hash']}"),
+        Scenario('contact form', '/contact'),
+        Scenario('contact submit', '/contact', method='POST', data=contact_form, writes=True),
+        Scenario('set_language', '/set_language/en'),
+        Scenario('not found', '/does-not-exist'),
+        Scenario('admin_login form', '/admin/login'),
+        Scenario('admin_login submit', '/admin/login', method='POST',
+                 data={'username': fixture.get('admin_username', 'admin'),
+                       'password': fixture.get('admin_password', 'admin123')}),
+        Scenario('admin_dashboard', '/admin', admin=True),
+        Scenario('admin_orders', '/admin/orders', admin=True),
+        Scenario('admin_orders pending', '/admin/orders?status=pending', admin=True),
+        Scenario('admin_orders search', f"/admin/orders?search={fixture['customer_email']}", admin=True),
+        Scenario('admin_orders text search', '/admin/orders?search=Customer%2012', admin=True),
+        Scenario('admin_order_detail', f'/admin/orders/{order_id}', admin=True),
+        Scenario('update_order_status', f'/admin/orders/{order_id}/status', method='POST',
+                 data={'status': 'in_progress'}, admin=True, writes=True),
+        Scenario('export_orders csv', '/admin/orders/export.csv?status=pending', admin=True,
+                 iterations=5),
+        Scenario('import_orders', '/admin/orders/import?format=jsonl', method='POST', admin=True,
+                 writes=True, iterations=20, body=_import_body(),
+                 content_type='application/x-ndjson'),
+        Scenario('admin_feedbacks', '/admin/feedbacks', admin=True),
+        Scenario('admin_feedbacks unprocessed', '/admin/feedbacks?status=new', admin=True),
+        Scenario('admin_feedback_detail', f'/admin/feedbacks/{feedback_id}', admin=True),
+        Scenario('update_feedback_status', f'/admin/feedbacks/{feedback_id}/status', method='POST',
+                 data={'status': 'processed'}, admin=True, writes=True),
+        Scenario('process_feedback', f'/admin/feedbacks/{feedback_id}/process', method='POST',
+                 admin=True, writes=True),
+        Scenario('export_feedbacks jsonl', '/admin/feedbacks/export.jsonl?gzip=1', admin=True,
+                 iterations=5),
+        Scenario('admin_cache_stats', '/admin/cache', admin=True),
+        Scenario('analytics timeseries', '/admin/analytics/timeseries?bucket=week&by=service_type',
+                 admin=True),
+        Scenario('analytics cohorts', '/admin/analytics/cohorts', admin=True),
+        Scenario('admin_logout', '/admin/logout', admin=True),
+    ]
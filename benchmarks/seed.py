@@ -0,0 +1,143 @@
+"""
+Seed a benchmark database with realistic volumes
+
+    python -m benchmarks.seed [--orders 100000] [--feedbacks 50000] [--posts 5000]
+
+Uses DATABASE_URL (point it at a scratch database), migrating it first.
+Orders and feedback are spread over the last year and the daily rollups are
+rebuilt afterwards. A table that already has rows is left alone, so re-running
+is cheap.
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+BATCH = 5000
+SERVICES = ('schedule', 'memes', 'documents', 'other')
+PLANS = ('free', 'basic', 'pro', 'team')
+STATUSES = ('pending', 'in_progress', 'completed', 'completed', 'completed')
+AMOUNTS = (0, 99000, 199000, 499000)
+WORDS = ('sinh viên', 'UEH', 'thời khóa biểu', 'meme', 'tài liệu', 'ôn thi', 'kinh tế',
+         'nhóm', 'thuyết trình', 'deadline', 'học bổng', 'thực tập', 'CLB', 'kỹ năng')
+
+def _timestamps(rng, start):
+    return start + timedelta(seconds=rng.randrange(365 * 86400))
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def seed_orders(db, Order, count, rng, start):
+    for offset in range(0, count, BATCH):
+        rows = []
+        for i in range(offset, min(offset + BATCH, count)):
+            created_at = _timestamps(rng, start)
+            rows.append({
+                'customer_name': f'Customer {i}',
+                'customer_email': f'customer{i}@example.com',
+                'customer_phone': f'09{i:08d}',
+                'service_type': rng.choice(SERVICES),
+                'plan_type': rng.choice(PLANS),
+                'description': _sentence(rng, 8),
+                'status': rng.choice(STATUSES),
+                'total_amount': rng.choice(AMOUNTS),
+                'tx_hash': f'0x{i:064x}',
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+        db.session.execute(db.insert(Order), rows)
+        db.session.commit()
+
+def seed_feedbacks(db, Feedback, count, rng, start):
+    for offset in range(0, count, BATCH):
+        db.session.execute(db.insert(Feedback), [{
+            'name': f'Visitor {i}',
+            'email': f'visitor{i}@example.com',
+            'subject': _sentence(rng, 4),
+            'message': _sentence(rng, 30),
+            'is_processed': rng.random() < 0.9,
+            'created_at': _timestamps(rng, start),
+        } for i in range(offset, min(offset + BATCH, count))])
+        db.session.commit()
+
+def seed_posts(db, BlogPost, count, rng, start):
+    for offset in range(0, count, BATCH):
+        rows = []
+        for i in range(offset, min(offset + BATCH, count)):
+            created_at = _timestamps(rng, start)
+            rows.append({
+                'title': f'{_sentence(rng, 5)} #{i}',
+                'slug': f'bai-viet-{i}',
+                'content': '\n\n'.join(_sentence(rng, 60) for _ in range(5)),
+                'excerpt': _sentence(rng, 20),
+                'published': rng.random() < 0.95,
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+        db.session.execute(db.insert(BlogPost), rows)
+        db.session.commit()
+
+def seed(n_orders=100000, n_feedbacks=50000, n_posts=5000):
+    """Create the schema and fill empty tables; call inside an app context"""
+    from app import db
+    from models import Order, Feedback, BlogPost
+    from rollups import rebuild_rollups
+    from schema import upgrade_schema
+
+    upgrade_schema(online=False)
+    rng = random.Random(42)
+    start = datetime.utcnow() - timedelta(days=365)
+    seeded = []
+    for model, count, fill in ((Order, n_orders, seed_orders), (Feedback, n_feedbacks, seed_feedbacks),
+                               (BlogPost, n_posts, seed_posts)):
+        if count and db.session.query(model.id).first() is None:
+            fill(db, model, count, rng, start)
+            seeded.append(f'{count} {model.__tablename__}')
+    if seeded:
+        rebuild_rollups()
+        if db.engine.dialect.name in ('postgresql', 'sqlite'):
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql('ANALYZE')
+                connection.commit()
+    return seeded
+
+def admin(username, password):
+    """Id of the benchmark admin account, created with these credentials if missing"""
+    from auth import create_admin
+    from models import User
+
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        user, _ = create_admin(username, f'{username}@example.com', password)
+    return user.id
+
+def fixture():
+    """Ids and keys of seeded rows that the route scenarios address"""
+    from models import Order, Feedback, BlogPost
+
+    order = Order.query.order_by(Order.id.desc()).first()
+    feedback = Feedback.query.order_by(Feedback.id.desc()).first()
+    post = BlogPost.query.filter_by(published=True).order_by(BlogPost.id.desc()).first()
+    return {
+        'order_id': order.id if order else 1,
+        'tx_hash': order.tx_hash if order else '0x0',
+        'customer_email': order.customer_email if order else 'customer0@example.com',
+        'feedback_id': feedback.id if feedback else 1,
+        'slug': post.slug if post else 'missing',
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--feedbacks', type=int, default=50000)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    from app import app, db
+    with app.app_context():
+        print(f'Database: {db.engine.url.render_as_string(hide_password=True)}')
+        seeded = seed(args.orders, args.feedbacks, args.posts)
+        print(f'Seeded {", ".join(seeded)}' if seeded else 'Tables already seeded')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Bulk order ingestion
+CSV, JSON-lines and JSON array streams are parsed incrementally (a JSON array
+one element at a time, never as a whole document), validated in
+chunks and inserted with one executemany per chunk (COPY on PostgreSQL).
+Invalid rows are reported individually and never abort the rest of the batch.
+"""
+
+import csv
+import io
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import click
+from sqlalchemy.exc import SQLAlchemyError
+import catalog
+from app import app, db
+from models import Order
+from data_store import invalidate_stats
+from orders import order_payload, compute_tx_hash
+from rollups import record_orders
+from tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+# Characters read at a time from a JSON array upload
+JSON_READ_SIZE = 64 * 1024
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+REQUIRED_FIELDS = ('customer_name', 'customer_email', 'service_type', 'plan_type')
+OPTIONAL_FIELDS = ('customer_phone', 'description', 'total_amount', 'status', 'created_at')
+ORDER_STATUSES = ('pending', 'in_progress', 'completed')
+FORMATS = ('csv', 'jsonl', 'json')
+
+class ImportReport:
+    """Outcome of an import: inserted row count and per-row errors"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.errors.append({'row': row_number, 'error': message})
+
+    def to_dict(self):
+        return {'inserted': self.inserted, 'failed': len(self.errors), 'errors': self.errors}
+
+def detect_format(filename, content_type=None):
+    """Guess the stream format from a file name or content type"""
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    if name.endswith('.json') or 'json' in content_type:
+        return 'json'
+    return 'csv'
+
+def iter_json_array(stream, read_size=None):
+    """Yield the elements of a top-level JSON array, reading the stream block by block"""
+    read_size = read_size or JSON_READ_SIZE
+    decoder = json.JSONDecoder()
+    buffer, eof = '', False
+
+    def fill():
+        nonlocal buffer, eof
+        block = stream.read(read_size)
+        eof = not block
+        buffer += block
+
+    def next_char():
+        # First character after whitespace, reading on as needed; '' at the end of the stream
+        nonlocal buffer
+        buffer = buffer.lstrip()
+        while not buffer and not eof:
+            fill()
+            buffer = buffer.lstrip()
+        return buffer[:1]
+
+    if next_char() != '[':
+        raise ValueError('JSON import must be an array of orders')
+    buffer = buffer[1:]
+    if next_char() == ']':
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A number cut by the end of the block ("22." of 22.5) continues in the next one
+            if eof or (end < len(buffer) and not (
+                    isinstance(value, (int, float)) and buffer[end] in _NUMBER_CHARS)):
+                break
+            fill()
+        yield value
+        buffer = buffer[end:]
+        separator = next_char()
+        buffer = buffer[1:]
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError('JSON import array is not closed')
+
+def iter_records(stream, fmt):
+    """Yield (row_number, record) pairs; record is an exception for unparsable rows"""
+    if fmt == 'csv':
+        # Row 1 is the header line
+        for row_number, record in enumerate(csv.DictReader(stream), start=2):
+            yield row_number, record
+    elif fmt == 'jsonl':
+        for row_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield row_number, json.loads(line)
+                except ValueError as e:
+                    yield row_number, e
+    elif fmt == 'json':
+        yield from enumerate(iter_json_array(stream), start=1)
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+def _column_limit(name):
+    return getattr(Order.__table__.c[name].type, 'length', None)
+
+def validate_record(record):
+    """Return (row, None) ready for insertion, or (None, error message)"""
+    if isinstance(record, Exception):
+        return None, f'Unparsable row: {record}'
+    if not isinstance(record, dict):
+        return None, 'Row must be an object'
+
+    row = {}
+    for field in REQUIRED_FIELDS + OPTIONAL_FIELDS:
+        value = record.get(field)
+        if value is not None and field != 'total_amount':
+            value = str(value).strip()
+        if value in (None, ''):
+            if field in REQUIRED_FIELDS:
+                return None, f'Missing {field}'
+            continue
+        limit = _column_limit(field) if isinstance(value, str) else None
+        if limit and len(value) > limit:
+            return None, f'{field} is longer than {limit} characters'
+        row[field] = value
+
+    # Imported here: email_validator builds large tables at import, which only imports need
+    from email_validator import validate_email, EmailNotValidError
+    try:
+        row['customer_email'] = validate_email(row['customer_email'], check_deliverability=False).normalized
+    except EmailNotValidError as e:
+        return None, f'Invalid customer_email: {e}'
+    if row['service_type'] not in catalog.SERVICES_BY_ID:
+        return None, f"Unknown service_type '{row['service_type']}'"
+    if row['plan_type'] not in catalog.PLANS_BY_ID:
+        return None, f"Unknown plan_type '{row['plan_type']}'"
+    if row.setdefault('status', 'pending') not in ORDER_STATUSES:
+        return None, f"Unknown status '{row['status']}'"
+    try:
+        row['total_amount'] = float(row.get('total_amount', 0))
+    except (TypeError, ValueError):
+        return None, 'total_amount must be a number'
+    if row['total_amount'] < 0:
+        return None, 'total_amount must not be negative'
+    try:
+        created_at = row.get('created_at')
+        row['created_at'] = datetime.fromisoformat(created_at) if created_at else datetime.utcnow()
+    except (TypeError, ValueError):
+        return None, 'created_at must be an ISO 8601 timestamp'
+    if row['created_at'].tzinfo is not None:
+        # Stored timestamps are naive UTC; an offset would sort and bucket wrongly next to them
+        row['created_at'] = row['created_at'].astimezone(timezone.utc).replace(tzinfo=None)
+
+    row.setdefault('customer_phone', None)
+    row.setdefault('description', None)
+    row['updated_at'] = row['created_at']
+    row['tx_hash'] = compute_tx_hash(order_payload(SimpleNamespace(**row)))
+    return row, None
+
+def _copy_rows(rows):
+    """COPY rows into the order table through psycopg2"""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f'COPY "order" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buffer)
+    finally:
+        cursor.close()
+
+def insert_rows(rows):
+    """Insert validated rows in one round-trip (COPY on PostgreSQL, executemany elsewhere)"""
+    if db.engine.dialect.name == 'postgresql' and db.engine.dialect.driver == 'psycopg2':
+        _copy_rows(rows)
+    else:
+        db.session.execute(db.insert(Order), rows)
+
+def _insert_chunk(chunk, report):
+    rows = [row for _, row in chunk]
+    try:
+        insert_rows(rows)
+        record_orders(rows)
+        db.session.commit()
+        report.inserted += len(rows)
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+    # Isolate the offending rows so the rest of the chunk still goes in
+    for row_number, row in chunk:
+        try:
+            db.session.execute(db.insert(Order), [row])
+            record_orders([row])
+            db.session.commit()
+            report.inserted += 1
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            report.add_error(row_number, f"Database error: {getattr(e, 'orig', e)}")
+
+def import_orders(stream, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Validate and insert orders from a text stream, chunk by chunk"""
+    report = ImportReport()
+    chunk = []
+    try:
+        for row_number, record in iter_records(stream, fmt):
+            row, error = validate_record(record)
+            if error:
+                report.add_error(row_number, error)
+                continue
+            chunk.append((row_number, row))
+            if len(chunk) >= chunk_size:
+                _insert_chunk(chunk, report)
+                chunk = []
+    except (ValueError, csv.Error) as e:
+        report.add_error(None, f'Stream could not be read: {e}')
+    if chunk:
+        _insert_chunk(chunk, report)
+
+    if report.inserted:
+        invalidate_stats()
+        enqueue('anchor_orders')
+    logger.info('Imported %d orders, %d rows rejected', report.inserted, len(report.errors))
+    return report
+
+@app.cli.command('import-orders')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--chunk-size', default=CHUNK_SIZE, show_default=True)
+def import_orders_command(path, fmt, chunk_size):
+    """Bulk import orders from a CSV, JSON or JSON-lines file ('-' for stdin)."""
+    if path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    else:
+        stream = open(path, encoding='utf-8-sig', newline='')
+    with stream:
+        report = import_orders(stream, fmt or detect_format(path), chunk_size)
+    click.echo(f'Inserted {report.inserted} orders, {len(report.errors)} rejected')
+    for error in report.errors:
+        click.echo(f"  row {error['row']}: {error['error']}", err=True)
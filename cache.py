@@ -0,0 +1,72 @@
+"""
+Process-local caching helpers for UEHer application
+Each gunicorn worker keeps its own copy, so counters are reported per process.
+"""
+
+import os
+import threading
+import time
+
+
+class TTLCache:
+    """Small thread-safe key/value cache with a time-to-live and hit/miss counters"""
+
+    def __init__(self, ttl=60, maxsize=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a cached value, or default if it is missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store a value; a ttl of 0 or None on the cache means no expiry"""
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if self.maxsize and key not in self._data and len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (value, expires)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value for key, computing and storing it on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        """Counters for monitoring how much load the cache absorbs"""
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.misses
+        return {
+            'pid': os.getpid(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0,
+            'size': size,
+            'ttl': self.ttl,
+        }
@@ -0,0 +1,171 @@
+"""
+Engine profiles per database backend
+DB_PROFILE picks the pool and driver settings: "sqlite-dev" (WAL journal,
+busy_timeout), "postgres-prod" (sized pool without a ping per checkout,
+server-side statement timeout, batched executemany) or "postgres-pgbouncer"
+(a pool without overflow in front of a transaction-pooling PgBouncer). "auto" chooses from
+the database URL. Pools report checkout waits and usage to the metrics registry.
+async_engine_options() gives the asyncpg/aiosqlite equivalent for asgi.py.
+"""
+
+import time
+import uuid
+import weakref
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+import metrics
+
+PROFILES = ('sqlite-dev', 'postgres-prod', 'postgres-pgbouncer')
+
+POOL_WAIT = metrics.histogram('ueher_db_pool_checkout_seconds',
+                              'Time to check a connection out of the pool, including connects',
+                              buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0))
+POOL_TIMEOUTS = metrics.counter('ueher_db_pool_timeouts_total',
+                                'Checkouts that gave up after pool_timeout')
+POOL_CONNECTIONS = metrics.gauge('ueher_db_pool_connections', 'Pooled connections by state',
+                                 ('state',))
+
+_pools = weakref.WeakSet()
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    # Log under sqlalchemy.pool like the stock pools, so echo_pool and
+    # "sqlalchemy.pool=DEBUG" in LOG_LEVELS still cover it
+    _sqla_logger_namespace = 'sqlalchemy.pool.impl.TimedQueuePool'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools.add(self)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+POOL_CONNECTIONS.set_function(lambda: sum(pool.checkedout() for pool in list(_pools)), state='checked_out')
+POOL_CONNECTIONS.set_function(lambda: sum(pool.checkedin() for pool in list(_pools)), state='idle')
+POOL_CONNECTIONS.set_function(lambda: sum(max(pool.overflow(), 0) for pool in list(_pools)),
+                              state='overflow')
+
+def resolve_profile(profile, url):
+    """The profile to use for url; "auto" picks sqlite-dev or postgres-prod"""
+    if profile in PROFILES:
+        return profile
+    if profile != 'auto':
+        raise ValueError(f"Unknown DB_PROFILE '{profile}', expected auto or one of {', '.join(PROFILES)}")
+    return 'sqlite-dev' if make_url(url).get_backend_name() == 'sqlite' else 'postgres-prod'
+
+def pool_size(config):
+    """Explicit DB_POOL_SIZE, else one connection per request thread and job worker"""
+    return config['DB_POOL_SIZE'] or config['WEB_THREADS'] + config['TASK_WORKERS']
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured profile and database URL"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    profile = resolve_profile(config['DB_PROFILE'], url)
+
+    if profile == 'sqlite-dev':
+        options = {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+                                    'check_same_thread': False}}
+        if url.database and url.database != ':memory:':
+            options.update(poolclass=TimedQueuePool, pool_size=pool_size(config),
+                           max_overflow=config['DB_MAX_OVERFLOW'],
+                           pool_timeout=config['DB_POOL_TIMEOUT'])
+        return options
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        # Recycling replaces the per-checkout ping; a dead connection surfaces as a
+        # disconnect error that invalidates the whole pool
+        'pool_pre_ping': False,
+        'pool_use_lifo': True,
+    }
+    psycopg2 = url.get_driver_name() == 'psycopg2'
+    if profile == 'postgres-prod':
+        options.update(pool_size=pool_size(config), max_overflow=config['DB_MAX_OVERFLOW'],
+                       pool_recycle=1800)
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            options['connect_args'] = {
+                'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+        if psycopg2:
+            options['executemany_mode'] = 'values_plus_batch'
+    else:
+        # PgBouncer multiplexes server connections, so client connections are
+        # cheap: one per thread that may hold one (fewer would queue requests
+        # behind the pool), no overflow, no startup options (rejected by
+        # PgBouncer) and no session state
+        options.update(pool_size=pool_size(config), max_overflow=0, pool_recycle=300)
+        if psycopg2:
+            options['executemany_mode'] = 'values_only'
+    return options
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+def async_url(url):
+    """The asyncio-driver equivalent of a sync database URL"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for '{backend}' databases")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'postgresql' and 'sslmode' in url.query:
+        # asyncpg takes the libpq sslmode values as its ssl argument
+        url = url.difference_update_query(['sslmode']).update_query_dict(
+            {'ssl': url.query['sslmode']})
+    return url
+
+def _unique_statement_name():
+    return f'__asyncpg_{uuid.uuid4()}__'
+
+def async_engine_options(config):
+    """create_async_engine() options matching engine_options() for the same profile"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    profile = resolve_profile(config['DB_PROFILE'], url)
+    if profile == 'sqlite-dev':
+        options = {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+        if url.database and url.database != ':memory:':
+            options['pool_size'] = config['ASYNC_DB_POOL_SIZE']
+        return options
+
+    # One event loop serves many requests at once, so the pool is not sized to threads
+    options = {'pool_size': config['ASYNC_DB_POOL_SIZE'], 'pool_timeout': config['DB_POOL_TIMEOUT'],
+               'pool_pre_ping': False, 'pool_use_lifo': True}
+    if profile == 'postgres-prod':
+        options.update(max_overflow=config['DB_MAX_OVERFLOW'], pool_recycle=1800)
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            options['connect_args'] = {'server_settings': {
+                'statement_timeout': str(config['DB_STATEMENT_TIMEOUT_MS'])}}
+    else:
+        # Prepared statements live on one server connection, which PgBouncer
+        # hands to other clients between transactions
+        options.update(max_overflow=0, pool_recycle=300,
+                       connect_args={'statement_cache_size': 0, 'prepared_statement_cache_size': 0,
+                                     'prepared_statement_name_func': _unique_statement_name})
+    return options
+
+def init_engine(engine, config):
+    """Per-connection settings that cannot be passed as engine options"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if resolve_profile(config['DB_PROFILE'], url) != 'sqlite-dev':
+        return
+    busy_timeout = config['SQLITE_BUSY_TIMEOUT_MS']
+
+    @event.listens_for(engine, 'connect')
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL lets readers proceed while a writer commits
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout)}')
+        finally:
+            cursor.close()
@@ -0,0 +1,95 @@
+"""
+Streaming CSV/JSON-lines export of orders and feedback
+Rows are fetched in fixed-size batches through server-side cursors and
+serialized into small output chunks, optionally gzipped on the fly, so memory
+use stays flat however many rows are exported. CSV cells that a spreadsheet
+would run as a formula are quoted (JSON lines are left as stored).
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from flask import Response, stream_with_context
+
+FETCH_SIZE = 1000
+CHUNK_BYTES = 64 * 1024
+
+ORDER_EXPORT_COLUMNS = ('id', 'customer_name', 'customer_email', 'customer_phone', 'service_type',
+                        'plan_type', 'description', 'status', 'total_amount', 'tx_hash',
+                        'created_at', 'updated_at')
+FEEDBACK_EXPORT_COLUMNS = ('id', 'name', 'email', 'subject', 'message', 'is_processed', 'created_at')
+
+def iter_rows(query, model, columns):
+    """Yield plain row tuples (no ORM objects) in id order via a streaming cursor"""
+    query = query.order_by(None).order_by(model.id) \
+        .with_entities(*(getattr(model, column) for column in columns))
+    try:
+        yield from query.yield_per(FETCH_SIZE)
+    finally:
+        # The body streams after the request removed its session, so the
+        # query's own session would hold its connection until collected
+        query.session.close()
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+# Spreadsheets run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def csv_safe(value):
+    """Text cells that a spreadsheet would evaluate are prefixed with a quote"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def iter_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([csv_safe(value) for value in row])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+def iter_jsonl(rows, columns):
+    parts, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(parts).encode('utf-8')
+            parts, size = [], 0
+    yield ''.join(parts).encode('utf-8')
+
+def gzip_stream(chunks):
+    """Compress an iterable of byte chunks into a gzip stream incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def export_response(query, model, columns, fmt, basename, compress=False):
+    """Streaming download of the query's rows as CSV or JSON lines"""
+    rows = iter_rows(query, model, columns)
+    if fmt == 'csv':
+        body, mimetype = iter_csv(rows, columns), 'text/csv'
+    else:
+        body, mimetype = iter_jsonl(rows, columns), 'application/x-ndjson'
+    filename = f'{basename}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}'
+    if compress:
+        body, mimetype, filename = gzip_stream(body), 'application/gzip', filename + '.gz'
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
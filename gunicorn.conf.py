@@ -0,0 +1,57 @@
+"""
+Gunicorn settings for UEHer application (read automatically from the working directory)
+
+GUNICORN_PROFILE picks how a host's CPUs are used:
+  "gthread" (default)  one worker per CPU, WEB_THREADS request threads each
+                       (default 4); the database pool follows WEB_THREADS
+  "gevent"             one worker per CPU, GEVENT_CONNECTIONS green threads
+                       each; needs the "gevent" extra
+WEB_CONCURRENCY overrides the worker count. The application is preloaded in
+the master (GUNICORN_PRELOAD=0 to import it in every worker instead) and each
+worker re-creates its connections and threads after the fork (lifecycle.py).
+"""
+
+import multiprocessing
+import os
+
+profile = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if profile not in ('gthread', 'gevent'):
+    raise ValueError(f"Unknown GUNICORN_PROFILE '{profile}', expected gthread or gevent")
+
+if profile == 'gevent':
+    # Patch before the preloaded application creates any lock or socket
+    from gevent import monkey
+    monkey.patch_all()
+    # psycopg2 blocks the whole worker on a query unless it yields to gevent
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+wsgi_app = 'main:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = timeout
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot accumulate; jitter keeps
+# them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = max_requests // 10
+
+if profile == 'gthread':
+    worker_class = 'gthread'
+    threads = int(os.environ.setdefault('WEB_THREADS', '4'))
+else:
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('GEVENT_CONNECTIONS', '200'))
+    # Green threads beyond the pool wait for a connection instead of each opening one
+    os.environ.setdefault('DB_POOL_SIZE', '10')
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        import lifecycle
+        lifecycle.preload()
+
+def post_fork(server, worker):
+    import lifecycle
+    lifecycle.init_worker()
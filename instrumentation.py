@@ -0,0 +1,167 @@
+"""
+Per-request performance instrumentation
+Every request records its SQL statement count, database time, template render
+time and slowest statement through SQLAlchemy cursor events and Flask signals.
+The totals are sent back in a Server-Timing header, aggregated into the
+metrics registry served at /metrics (to scrapers presenting METRICS_TOKEN),
+and a statement repeated many times in one request is logged as a likely N+1
+query.
+"""
+
+import hmac
+import logging
+import sys
+import time
+from collections import Counter
+from flask import Response, abort, g, has_request_context, request, request_started, request_finished, \
+    before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+import metrics
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = metrics.counter('ueher_http_requests_total', 'HTTP requests served',
+                           ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = metrics.histogram('ueher_http_request_duration_seconds',
+                                    'Time to build the response', ('endpoint',))
+DB_SECONDS = metrics.histogram('ueher_db_time_per_request_seconds',
+                               'Total SQL time per request', ('endpoint',))
+DB_QUERIES = metrics.histogram('ueher_db_queries_per_request', 'SQL statements per request',
+                               ('endpoint',), buckets=(0, 1, 2, 5, 10, 20, 50, 100))
+TEMPLATE_SECONDS = metrics.histogram('ueher_template_render_seconds',
+                                     'Template render time', ('template',))
+N_PLUS_ONE = metrics.counter('ueher_n_plus_one_total',
+                             'Requests that repeated one statement past the threshold', ('endpoint',))
+CACHE_HITS = metrics.gauge('ueher_cache_hits', 'Hits of the per-worker caches', ('cache',))
+CACHE_MISSES = metrics.gauge('ueher_cache_misses', 'Misses of the per-worker caches', ('cache',))
+
+# (cache, module, info function); a module this worker has not imported yet
+# (analytics loads with the admin pages) reports zero rather than being loaded
+CACHES = (
+    ('stats', 'data_store', 'stats_cache_info'),
+    ('pages', 'page_cache', 'page_cache_info'),
+    ('analytics', 'analytics', 'analytics_cache_info'),
+    ('users', 'auth', 'user_cache_info'),
+    ('fragments', 'templating', 'fragment_cache_info'),
+)
+
+def _cache_stat(module_name, function, field):
+    module = sys.modules.get(module_name)
+    return getattr(module, function)()[field] if module is not None else 0
+
+for _name, _module, _function in CACHES:
+    CACHE_HITS.set_function(lambda m=_module, f=_function: _cache_stat(m, f, 'hits'), cache=_name)
+    CACHE_MISSES.set_function(lambda m=_module, f=_function: _cache_stat(m, f, 'misses'), cache=_name)
+
+class RequestStats:
+    """What one request spent in the database and in templates"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.slowest = (0.0, None)
+        self.statements = Counter()
+
+    def record_query(self, statement, duration):
+        self.query_count += 1
+        self.db_time += duration
+        self.statements[statement] += 1
+        if duration > self.slowest[0]:
+            self.slowest = (duration, statement)
+
+    def repeated_statements(self, threshold):
+        return [(statement, count) for statement, count in self.statements.most_common()
+                if count >= threshold]
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'app;dur={total * 1000:.1f}',
+        ))
+
+def current_stats():
+    """Stats of the request being served, or None outside a request"""
+    return g.get('_request_stats') if has_request_context() else None
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record_query(statement, time.perf_counter() - started)
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements
+    started = exception_context.connection.info.get('query_started') \
+        if exception_context.connection is not None else None
+    if started:
+        started.pop()
+
+@before_render_template.connect_via(app)
+def _template_started(sender, template, context, **extra):
+    stats = current_stats()
+    if stats is not None:
+        g.setdefault('_template_started', []).append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def _template_finished(sender, template, context, **extra):
+    stats = current_stats()
+    started = g.get('_template_started')
+    if stats is None or not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats.template_time += duration
+    TEMPLATE_SECONDS.observe(duration, template=template.name or '<string>')
+
+@request_started.connect_via(app)
+def _request_started(sender, **extra):
+    g._request_stats = RequestStats()
+
+@request_finished.connect_via(app)
+def _request_finished(sender, response, **extra):
+    stats = current_stats()
+    if stats is None:
+        return
+    total = time.perf_counter() - stats.started
+    endpoint = request.endpoint or '<unmatched>'
+
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    REQUEST_SECONDS.observe(total, endpoint=endpoint)
+    DB_SECONDS.observe(stats.db_time, endpoint=endpoint)
+    DB_QUERIES.observe(stats.query_count, endpoint=endpoint)
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = stats.server_timing(total)
+
+    repeated = stats.repeated_statements(app.config['N_PLUS_ONE_THRESHOLD'])
+    if repeated:
+        N_PLUS_ONE.inc(endpoint=endpoint)
+        statement, count = repeated[0]
+        logger.warning('Possible N+1 in %s: statement ran %d times: %s',
+                       endpoint, count, ' '.join(statement.split())[:200])
+    if total * 1000 >= app.config['SLOW_REQUEST_MS']:
+        duration, statement = stats.slowest
+        logger.warning('Slow request %s %s: %.0f ms, %d queries in %.0f ms, templates %.0f ms; '
+                       'slowest query %.0f ms: %s', request.method, request.path, total * 1000,
+                       stats.query_count, stats.db_time * 1000, stats.template_time * 1000,
+                       duration * 1000, ' '.join((statement or '').split())[:200])
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint for this worker's metrics"""
+    token = app.config['METRICS_TOKEN']
+    if not token:
+        abort(404)
+    scheme, _, presented = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(presented.strip().encode(), token.encode()):
+        abort(401)
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,50 @@
+"""
+Process lifecycle for UEHer application
+With `preload_app` (gunicorn.conf.py) the master imports the application once
+and warms what every worker can share copy-on-write: the catalogs and search
+index built at import, compiled templates and the admin views. Nothing in the
+master may hold a connection or a thread when it forks, so init_worker() runs
+in each worker right after the fork: it drops the inherited connection pools
+without closing the master's sockets, replaces per-process backends, restarts
+the log writer thread and opens the worker's first database connection.
+"""
+
+import gc
+import logging
+from sqlalchemy.exc import SQLAlchemyError
+import admin_urls
+import logging_config
+import ratelimit
+import tasks
+import templating
+from app import app, db
+
+logger = logging.getLogger(__name__)
+
+def dispose_engines(close=True):
+    """Empty every engine's pool; close=False leaves the connections to the parent process"""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+def preload():
+    """Warm shared state in the master before workers are forked"""
+    admin_urls.load_views()
+    templates = templating.precompile_templates()
+    dispose_engines()
+    # Keep the collector in the workers from writing to (and so copying) the
+    # pages of every object loaded so far
+    gc.freeze()
+    logger.info('Preloaded %d template(s) for the workers', templates)
+
+def init_worker():
+    """Per-process setup after fork; safe to call in a process that did not preload"""
+    logging_config.start_queue_listener()
+    dispose_engines(close=False)
+    tasks.reset_backend(wait=False)
+    ratelimit.reset_backend()
+    try:
+        with app.app_context(), db.engine.connect():
+            pass
+    except SQLAlchemyError:
+        logger.warning('Database unavailable at worker start', exc_info=True)
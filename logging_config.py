@@ -0,0 +1,161 @@
+"""
+Logging setup for UEHer application
+Levels and format come from the environment (LOG_LEVEL, LOG_LEVELS,
+LOG_FORMAT). Request threads only put records on an in-memory queue; a
+QueueListener thread formats them and does the stderr I/O. Every record
+carries the id of the request that produced it, and one request in
+LOG_REQUEST_SAMPLE_RATE gets an access log line (errors always do).
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import g, has_request_context, request, request_started, request_finished
+
+# Loggers that are far too chatty at the root level
+DEFAULT_LEVELS = {
+    'sqlalchemy.engine': 'WARNING',
+    'sqlalchemy.pool': 'WARNING',
+    'werkzeug': 'INFO',
+}
+
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'request_id'}
+
+_listener = None
+_listener_pid = None
+_queue = None
+_formatter = None
+
+access_logger = logging.getLogger('ueher.access')
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id ('-' outside requests)"""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """Queue records for the listener thread in this process
+
+    The stock handler formats the record up front so it can be pickled; here
+    the message is only interpolated (freezing mutable arguments) and the
+    exception info is left for the listener's formatter.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+def parse_levels(spec):
+    """'sqlalchemy.engine=INFO,werkzeug=WARNING' -> {logger: level}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def start_queue_listener():
+    """(Re)start the thread that writes queued records; needed again after fork"""
+    global _listener, _listener_pid
+    stop_queue_listener()
+    if _queue is None:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_formatter)
+    _listener = logging.handlers.QueueListener(_queue, handler, respect_handler_level=False)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+def stop_queue_listener():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None and _listener_pid != os.getpid():
+        # Inherited through fork: the thread only exists in the parent, and
+        # stopping it here would leave its sentinel for the next listener
+        _listener = None
+    if _listener is not None:
+        try:
+            _listener.stop()
+        finally:
+            _listener = None
+
+def configure_logging(app):
+    """Install the queue handler on the root logger and the request-id/access-log hooks"""
+    global _queue, _formatter
+    config = app.config
+    _formatter = JsonFormatter() if config['LOG_FORMAT'] == 'json' else logging.Formatter(TEXT_FORMAT)
+
+    _queue = queue.SimpleQueue()
+    queue_handler = LocalQueueHandler(_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config['LOG_LEVEL'].upper())
+    for name, level in dict(DEFAULT_LEVELS, **parse_levels(config['LOG_LEVELS'])).items():
+        logging.getLogger(name).setLevel(level)
+
+    start_queue_listener()
+    atexit.register(stop_queue_listener)
+    _register_request_hooks(app)
+
+def _register_request_hooks(app):
+    @request_started.connect_via(app)
+    def assign_request_id(sender, **extra):
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if 0 < len(incoming) <= 128 and incoming.isprintable() \
+            else uuid.uuid4().hex
+        g.request_log_started = time.perf_counter()
+        g.request_log_sampled = random.random() < app.config['LOG_REQUEST_SAMPLE_RATE']
+
+    @request_finished.connect_via(app)
+    def log_request(sender, response, **extra):
+        request_id = g.get('request_id')
+        if request_id is None:
+            return
+        response.headers['X-Request-ID'] = request_id
+        if not g.request_log_sampled and response.status_code < 500:
+            return
+        access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'endpoint': request.endpoint,
+            'duration_ms': round((time.perf_counter() - g.request_log_started) * 1000, 1),
+        })
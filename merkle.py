@@ -0,0 +1,48 @@
+"""
+Merkle tree helpers for batched order anchoring
+Leaves and interior nodes are hashed with distinct prefixes (as in RFC 6962)
+so a leaf can never be passed off as an interior node. An odd node at the end
+of a level is promoted unchanged to the next level.
+"""
+
+import hashlib
+
+def leaf_hash(data):
+    return hashlib.sha256(b'\x00' + data).digest()
+
+def node_hash(left, right):
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+def build_levels(leaves):
+    """All tree levels from the hashed leaves up to the root; leaves are raw bytes"""
+    if not leaves:
+        raise ValueError('Cannot build a Merkle tree without leaves')
+    levels = [[leaf_hash(leaf) for leaf in leaves]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_root(levels):
+    return levels[-1][0].hex()
+
+def inclusion_proof(levels, index):
+    """Sibling hashes from leaf to root as [side, hex] pairs; side is 'L' or 'R'"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(['L' if sibling < index else 'R', level[sibling].hex()])
+        index //= 2
+    return proof
+
+def verify_proof(leaf, proof, root):
+    """Check in O(log n) that leaf (raw bytes) is included under root (hex)"""
+    current = leaf_hash(leaf)
+    for side, sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        current = node_hash(sibling, current) if side == 'L' else node_hash(current, sibling)
+    return current.hex() == root
@@ -1,4 +1,5 @@
 from app import db
+from flask import current_app
 from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -12,12 +13,23 @@ class User(UserMixin, db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
 class Order(db.Model):
+    __table_args__ = (
+        # Status-filtered lists and dashboard counts, newest first
+        db.Index('ix_order_status_created_at', 'status', 'created_at', 'id'),
+        # Unfiltered lists and keyset pagination
+        db.Index('ix_order_created_at_id', 'created_at', 'id'),
+        # The pending queue is small relative to the table
+        db.Index('ix_order_pending_created_at', 'created_at', 'id',
+                 postgresql_where=db.text("status = 'pending'"),
+                 sqlite_where=db.text("status = 'pending'")),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     customer_name = db.Column(db.String(100), nullable=False)
     customer_email = db.Column(db.String(120), nullable=False)
@@ -27,11 +39,19 @@ class Order(db.Model):
     description = db.Column(db.Text)
     status = db.Column(db.String(20), default='pending')  # pending, in_progress, completed
     total_amount = db.Column(db.Float, default=0.0)
-    tx_hash = db.Column(db.String(66))  # Blockchain transaction hash
+    tx_hash = db.Column(db.String(66), unique=True, index=True)  # Blockchain transaction hash
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Feedback(db.Model):
+    __table_args__ = (
+        db.Index('ix_feedback_is_processed_created_at', 'is_processed', 'created_at', 'id'),
+        db.Index('ix_feedback_created_at_id', 'created_at', 'id'),
+        db.Index('ix_feedback_unprocessed_created_at', 'created_at', 'id',
+                 postgresql_where=db.text('NOT is_processed'),
+                 sqlite_where=db.text('is_processed = 0')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), nullable=False)
@@ -50,3 +70,46 @@ class BlogPost(db.Model):
     published = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AnchorBatch(db.Model):
+    """A batch of orders whose Merkle root was anchored in one chain transaction"""
+    id = db.Column(db.Integer, primary_key=True)
+    merkle_root = db.Column(db.String(64), nullable=False)
+    chain_tx = db.Column(db.String(66), index=True)  # None until the root is anchored
+    leaf_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class OrderProof(db.Model):
+    """Inclusion proof of one order's digest in an anchored batch"""
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), unique=True, nullable=False)
+    batch_id = db.Column(db.Integer, db.ForeignKey('anchor_batch.id'), nullable=False, index=True)
+    leaf_index = db.Column(db.Integer, nullable=False)
+    proof = db.Column(db.Text, nullable=False)  # JSON list of [side, sibling hash]
+
+    batch = db.relationship('AnchorBatch')
+
+class OrderDailyRollup(db.Model):
+    """Order count and revenue for one day, status, service and plan"""
+    __table_args__ = (
+        db.UniqueConstraint('day', 'status', 'service_type', 'plan_type',
+                            name='uq_order_daily_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    service_type = db.Column(db.String(50), nullable=False)
+    plan_type = db.Column(db.String(20), nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class OrderRollupDelta(db.Model):
+    """Change to one OrderDailyRollup bucket, appended by an order write and folded in later"""
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    service_type = db.Column(db.String(50), nullable=False)
+    plan_type = db.Column(db.String(20), nullable=False)
+    order_count = db.Column(db.Integer, nullable=False)
+    revenue = db.Column(db.Float, nullable=False)
@@ -0,0 +1,89 @@
+"""
+Order creation and post-commit processing
+Orders are inserted once with their transaction hash already computed. The
+follow-up work (batched anchoring, confirmation email, stats invalidation) is
+queued on the background job queue.
+"""
+
+import hashlib
+import json
+import secrets
+import smtplib
+import threading
+from datetime import datetime
+from email.message import EmailMessage
+from app import app, db
+from models import Order
+from data_store import invalidate_stats
+from tasks import job, enqueue
+
+def order_payload(order):
+    """Canonical description of an order used for hashing"""
+    return {
+        'customer': order.customer_name,
+        'email': order.customer_email,
+        'service': order.service_type,
+        'plan': order.plan_type,
+        'amount': order.total_amount,
+        'timestamp': order.created_at.isoformat(),
+    }
+
+def order_digest(order):
+    """SHA-256 digest of a stored order, including its transaction hash"""
+    payload = dict(order_payload(order), tx_hash=order.tx_hash)
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def compute_tx_hash(payload):
+    # Mock transaction hash (in real implementation, this would be from blockchain)
+    salted = dict(payload, nonce=secrets.token_hex(16))
+    return '0x' + hashlib.sha256(json.dumps(salted, sort_keys=True).encode()).hexdigest()
+
+def new_order(**fields):
+    """Build an Order with created_at and tx_hash set, ready for a single INSERT"""
+    order = Order(**fields)
+    order.status = order.status or 'pending'
+    order.total_amount = order.total_amount or 0.0
+    order.created_at = order.created_at or datetime.utcnow()
+    order.tx_hash = compute_tx_hash(order_payload(order))
+    return order
+
+def order_committed(order_id):
+    """Queue the post-commit work for a newly created order"""
+    enqueue('anchor_orders')
+    enqueue('send_order_confirmation', order_id=order_id)
+    enqueue('refresh_stats')
+
+# Held while this worker anchors; jobs queued meanwhile by other checkouts return at once
+_anchoring = threading.Lock()
+
+@job
+def anchor_orders():
+    """Anchor pending batches while one is full or its window has elapsed"""
+    from anchoring import batch_due, anchor_pending_orders, publish_unanchored
+    if not _anchoring.acquire(blocking=False):
+        return
+    try:
+        publish_unanchored()
+        while batch_due():
+            if anchor_pending_orders() is None:
+                break
+    finally:
+        _anchoring.release()
+
+@job
+def send_order_confirmation(order_id):
+    """Email the customer their transaction hash, when SMTP is configured"""
+    order = db.session.get(Order, order_id)
+    if order is None or not app.config['SMTP_HOST']:
+        return
+    message = EmailMessage()
+    message['Subject'] = f'UEHer - Xác nhận đơn hàng #{order.id}'
+    message['From'] = app.config['MAIL_SENDER']
+    message['To'] = order.customer_email
+    message.set_content(f'Cảm ơn bạn đã đặt hàng! Mã giao dịch: {order.tx_hash}')
+    with smtplib.SMTP(app.config['SMTP_HOST'], app.config['SMTP_PORT'], timeout=10) as smtp:
+        smtp.send_message(message)
+
+@job
+def refresh_stats():
+    invalidate_stats()
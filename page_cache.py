@@ -0,0 +1,53 @@
+"""
+Full-page response cache for UEHer application
+Static-content pages are rendered once per endpoint, language and relevant
+query args, then served with a strong ETag so browsers and CDNs can revalidate.
+"""
+
+import functools
+import hashlib
+from flask import request, session, make_response
+from app import app
+from cache import TTLCache
+
+_page_cache = TTLCache(ttl=app.config['PAGE_CACHE_TTL'], maxsize=512)
+
+def cached_page(*vary_args):
+    """Decorator caching a view's rendered HTML, keyed on the given query args"""
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Pending flash messages are per-visitor, so render those pages normally
+            if session.get('_flashes'):
+                return f(*args, **kwargs)
+
+            from routes import inject_language
+            key = (
+                request.endpoint,
+                inject_language()['current_lang'],
+                tuple(request.args.get(arg) for arg in vary_args),
+                tuple(sorted(kwargs.items())),
+            )
+            entry = _page_cache.get(key)
+            if entry is None:
+                body = f(*args, **kwargs)
+                if not isinstance(body, str):
+                    return body
+                body = body.encode('utf-8')
+                entry = (body, hashlib.sha256(body).hexdigest())
+                _page_cache.set(key, entry)
+
+            response = make_response(entry[0])
+            response.set_etag(entry[1])
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response.make_conditional(request)
+        return decorated_function
+    return decorator
+
+def clear_page_cache():
+    _page_cache.clear()
+
+def page_cache_info():
+    """Hit/miss counters of the page cache for this worker"""
+    return _page_cache.info()
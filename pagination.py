@@ -0,0 +1,84 @@
+"""
+Keyset (cursor) pagination for admin list views
+Pages are addressed by the (created_at, id) of their boundary rows instead of
+an OFFSET, so fetching a deep page costs the same as fetching the first one.
+"""
+
+import base64
+import json
+from datetime import datetime
+from app import db
+
+class KeysetPage:
+    """One page of rows in newest-first order with opaque next/prev tokens"""
+
+    def __init__(self, items, next_token, prev_token, per_page, total_estimate=None):
+        self.items = items
+        self.next_token = next_token
+        self.prev_token = prev_token
+        self.per_page = per_page
+        self.total_estimate = total_estimate
+
+    @property
+    def has_next(self):
+        return self.next_token is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_token is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+def encode_cursor(row, direction):
+    payload = json.dumps([row.created_at.isoformat(), row.id, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Return (created_at, id, direction), or None for a missing or malformed token"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ('next', 'prev'):
+            return None
+        return datetime.fromisoformat(created_at), int(row_id), direction
+    except (ValueError, TypeError):
+        return None
+
+def keyset_paginate(query, model, cursor=None, per_page=20, estimate_total=False, estimate_cap=10000):
+    """Paginate a filtered query newest-first on (created_at, id)
+
+    With estimate_total the page carries a row count capped at estimate_cap,
+    which is cheap on large tables where an exact COUNT is not.
+    """
+    created_at, row_id = model.created_at, model.id
+    position = decode_cursor(cursor)
+    page_query = query
+
+    if position and position[2] == 'next':
+        page_query = page_query.filter(db.tuple_(created_at, row_id) < db.tuple_(position[0], position[1]))
+    elif position:
+        page_query = page_query.filter(db.tuple_(created_at, row_id) > db.tuple_(position[0], position[1]))
+
+    if position and position[2] == 'prev':
+        rows = page_query.order_by(created_at.asc(), row_id.asc()).limit(per_page + 1).all()
+        more_before = len(rows) > per_page
+        rows = list(reversed(rows[:per_page]))
+        has_next, has_prev = True, more_before
+    else:
+        rows = page_query.order_by(created_at.desc(), row_id.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = position is not None
+
+    next_token = encode_cursor(rows[-1], 'next') if rows and has_next else None
+    prev_token = encode_cursor(rows[0], 'prev') if rows and has_prev else None
+
+    total_estimate = None
+    if estimate_total:
+        capped = query.order_by(None).with_entities(row_id).limit(estimate_cap + 1).subquery()
+        total_estimate = min(db.session.query(db.func.count()).select_from(capped).scalar(), estimate_cap)
+
+    return KeysetPage(rows, next_token, prev_token, per_page, total_estimate)
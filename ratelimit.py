@@ -0,0 +1,217 @@
+"""
+Token-bucket rate limiting for UEHer application
+Form POSTs that write rows (order submission, contact feedback) are throttled
+per client IP and per email address before any database work, admin logins
+per IP and per IP and username together (so nobody can lock an admin out by
+failing logins under their name from elsewhere). RATE_LIMITS sets the buckets as
+"order:ip=20/hour,contact:email=5/hour"; each allows that many requests in a
+burst and refills evenly over the period. A request takes a token from every
+bucket it falls in, or from none when one of them is empty.
+RATE_LIMIT_BACKEND selects where buckets live: "memory" (per worker, the
+default) or "redis" (shared by every worker through RATE_LIMIT_REDIS_URL).
+Other backends can be added with register_backend().
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from werkzeug.exceptions import TooManyRequests
+import metrics
+from app import app
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+DEFAULT_LIMITS = {
+    'order:ip': '20/hour',
+    'order:email': '5/hour',
+    'contact:ip': '10/hour',
+    'contact:email': '5/hour',
+    'login:ip': '30/hour',
+    'login:ip_username': '10/hour',
+}
+
+# Emails longer than the RFC 5321 limit are cut so keys stay small
+MAX_KEY_LENGTH = 254
+
+REJECTED = metrics.counter('ueher_rate_limit_rejected_total',
+                           'Requests refused by a rate limit bucket', ('scope', 'key'))
+STORE_ERRORS = metrics.counter('ueher_rate_limit_store_errors_total',
+                               'Rate limit checks let through because the store failed')
+
+_backends = {}
+_backend = None
+_backend_lock = threading.Lock()
+
+def parse_limit(spec):
+    """'20/hour' -> (capacity, tokens refilled per second)"""
+    count, _, period = spec.partition('/')
+    seconds = PERIODS.get(period.strip().lower())
+    if seconds is None or not count.strip().isdigit() or int(count) < 1:
+        raise ValueError(f"Invalid rate limit '{spec}', expected e.g. 5/minute")
+    return int(count), int(count) / seconds
+
+def parse_limits(spec):
+    """'order:ip=20/hour,...' -> {'order:ip': (capacity, rate)}, over DEFAULT_LIMITS"""
+    limits = dict(DEFAULT_LIMITS)
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, limit = item.split('=', 1)
+            limits[name.strip()] = limit.strip()
+    return {name: parse_limit(limit) for name, limit in limits.items()}
+
+class RateLimited(TooManyRequests):
+    """429 with a Retry-After header"""
+    description = 'Bạn đã gửi quá nhiều yêu cầu. Vui lòng thử lại sau ít phút.'
+
+class MemoryBackend:
+    """Buckets in this process, least recently used dropped beyond max_keys"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets):
+        """Take a token from every (key, capacity, rate) bucket, or from none if one is empty
+
+        Returns (index of the first empty bucket or None, seconds until it refills a token).
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, capacity, rate in buckets:
+                tokens, updated = self._buckets.pop(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - updated) * rate))
+            rejected = next((i for i, tokens in enumerate(levels) if tokens < 1), None)
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - 1 if rejected is None else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if rejected is None:
+            return None, 0.0
+        return rejected, (1 - levels[rejected]) / buckets[rejected][2]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+# Refill every bucket in KEYS (ARGV holds capacity, rate per key) and take a
+# token from each only if none is empty, atomically on the server and timed by
+# the server clock so workers on different hosts agree.
+# Returns {1-based index of the first empty bucket or 0, retry_after}.
+_TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local rejected = 0
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    levels[i] = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    if levels[i] < 1 and rejected == 0 then
+        rejected = i
+        retry_after = (1 - levels[i]) / rate
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local tokens = levels[i]
+    if rejected == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+return {rejected, tostring(retry_after)}
+"""
+
+class RedisBackend:
+    """Buckets shared by all workers in a Redis (or protocol-compatible) server"""
+
+    def __init__(self, client, prefix='ueher:ratelimit:'):
+        self.prefix = prefix
+        self._client = client
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, buckets):
+        """Like MemoryBackend.acquire, in one script call"""
+        rejected, retry_after = self._script(
+            keys=[self.prefix + key for key, _, _ in buckets],
+            args=[value for _, capacity, rate in buckets for value in (capacity, rate)])
+        return (rejected - 1 if rejected else None), float(retry_after)
+
+    def reset(self):
+        for key in self._client.scan_iter(match=self.prefix + '*'):
+            self._client.delete(key)
+
+def _redis_backend(config):
+    try:
+        import redis
+    except ImportError as exc:
+        raise ImportError("RATE_LIMIT_BACKEND=redis needs the 'redis' package") from exc
+    client = redis.Redis.from_url(config['RATE_LIMIT_REDIS_URL'], socket_timeout=0.1,
+                                  socket_connect_timeout=0.1)
+    return RedisBackend(client)
+
+def register_backend(name, factory):
+    """Make a backend available to RATE_LIMIT_BACKEND; factory receives the app config"""
+    _backends[name] = factory
+
+register_backend('memory', lambda config: MemoryBackend(config['RATE_LIMIT_MAX_KEYS']))
+register_backend('redis', _redis_backend)
+
+def get_backend():
+    """The configured backend, created on first use in each process"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _backends[app.config['RATE_LIMIT_BACKEND']](app.config)
+    return _backend
+
+def reset_backend():
+    """Forget the current backend; the next check creates a fresh one"""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+_limits = parse_limits(app.config['RATE_LIMITS'])
+
+def check(scope, **keys):
+    """Take a token from each of scope's buckets, e.g. check('order', ip=..., email=...)
+
+    Raises RateLimited when one is empty. Falsy key values are skipped, and a
+    failing shared store lets the request through rather than blocking writes.
+    """
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+    key_types, buckets = [], []
+    for key_type, value in keys.items():
+        limit = _limits.get(f'{scope}:{key_type}')
+        if limit is None or not value:
+            continue
+        value = str(value).strip().lower()[:MAX_KEY_LENGTH]
+        key_types.append(key_type)
+        buckets.append((f'{scope}:{key_type}:{value}', *limit))
+    if not buckets:
+        return
+    try:
+        # All or nothing, so a request refused by one bucket does not drain the others
+        rejected, retry_after = get_backend().acquire(buckets)
+    except Exception:
+        STORE_ERRORS.inc()
+        logger.warning('Rate limit store unavailable, allowing %s request', scope, exc_info=True)
+        return
+    if rejected is not None:
+        key_type = key_types[rejected]
+        REJECTED.inc(scope=scope, key=key_type)
+        logger.info('Rate limited %s request by %s', scope, key_type)
+        raise RateLimited(retry_after=max(1, round(retry_after)))
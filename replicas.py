@@ -0,0 +1,73 @@
+"""
+Read-replica routing for the database session
+Views decorated with @read_only send their queries to one of the replicas in
+DATABASE_REPLICA_URLS (one replica per request, so a page reads a consistent
+snapshot). Everything else, and any session that has written, uses the
+primary. After a commit the client is pinned to the primary for
+REPLICA_STICKY_SECONDS so it reads its own writes, e.g. the verify page shown
+right after checkout.
+"""
+
+import functools
+import random
+import time
+from flask import current_app, g, has_request_context, session as client_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_PREFIX = 'replica_'
+STICKY_KEY = '_primary_until'
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for the replica URLs"""
+    return {f'{REPLICA_PREFIX}{i}': url for i, url in enumerate(urls, start=1)}
+
+def read_only(view):
+    """Let the view's queries run on a replica"""
+    @functools.wraps(view)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return decorated_function
+
+def pinned_to_primary():
+    """Whether this client wrote recently and must read from the primary"""
+    return client_session.get(STICKY_KEY, 0) > time.time()
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that routes read-only requests to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            replica = self._replica(clause)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica(self, clause):
+        if clause is not None and getattr(clause, 'is_dml', False):
+            self.info['wrote'] = True
+        if self._flushing or self.info.get('wrote') or not has_request_context() \
+                or not g.get('db_read_only'):
+            return None
+        if 'replica' not in self.info:
+            names = [name for name in self._db.engines if name and name.startswith(REPLICA_PREFIX)]
+            self.info['replica'] = None if not names or pinned_to_primary() else random.choice(names)
+        return self._db.engines[self.info['replica']] if self.info['replica'] else None
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_to_primary(session):
+    if not session.info.pop('wrote', False) or not has_request_context():
+        return
+    if any(name and name.startswith(REPLICA_PREFIX) for name in session._db.engines):
+        # Later reads in this request and the client's next requests see the write
+        session.info['replica'] = None
+        client_session[STICKY_KEY] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_writes(session):
+    session.info.pop('wrote', None)
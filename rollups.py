@@ -0,0 +1,262 @@
+"""
+Materialized daily order rollups
+OrderDailyRollup holds one row per (day, status, service, plan) with the order
+count and revenue of that bucket, so the dashboard reads a few dozen rollup
+rows instead of scanning the order table. Order changes append their deltas to
+OrderRollupDelta in the same transaction (plain inserts, so concurrent
+checkouts never wait on the row of today's bucket), and each worker folds the
+deltas into the rollup rows every ROLLUP_FOLD_INTERVAL seconds. Readers see
+rollups plus unfolded deltas through rollup_rows(). `flask rebuild-rollups`
+recomputes the whole table from the orders.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from blinker import Namespace
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from app import app, db
+from models import Order, OrderDailyRollup, OrderRollupDelta
+from tasks import job, enqueue
+
+logger = logging.getLogger(__name__)
+
+# Columns that decide which bucket an order counts in, and how much
+TRACKED_FIELDS = ('created_at', 'status', 'service_type', 'plan_type', 'total_amount')
+BUCKET_COLUMNS = ('day', 'status', 'service_type', 'plan_type')
+
+_signals = Namespace()
+# Sent after commit with days=<set of dates>, or days=None after a rebuild
+rollups_changed = _signals.signal('rollups-changed')
+
+def _bucket(values):
+    """Rollup key and revenue of an order given as a mapping of its fields"""
+    key = (values['created_at'].date(), values['status'] or 'pending',
+           values['service_type'], values['plan_type'])
+    return key, values['total_amount'] or 0.0
+
+def _add(deltas, values, sign):
+    key, revenue = _bucket(values)
+    count, total = deltas.get(key, (0, 0.0))
+    deltas[key] = (count + sign, total + sign * revenue)
+
+def _upsert_statement(dialect_name):
+    table = OrderDailyRollup.__table__
+    insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[name] for name in BUCKET_COLUMNS],
+        set_={'order_count': table.c.order_count + stmt.excluded.order_count,
+              'revenue': table.c.revenue + stmt.excluded.revenue})
+
+def _delta_rows(deltas):
+    return [dict(zip(BUCKET_COLUMNS, key), order_count=count, revenue=revenue)
+            for key, (count, revenue) in deltas.items() if count or revenue]
+
+def apply_deltas(connection, deltas):
+    """Add {bucket: (count, revenue)} deltas to the rollup table on connection"""
+    params = _delta_rows(deltas)
+    if not params:
+        return
+    if connection.dialect.name in ('postgresql', 'sqlite'):
+        connection.execute(_upsert_statement(connection.dialect.name), params)
+        return
+    table = OrderDailyRollup.__table__
+    for row in params:
+        match = db.and_(*(table.c[name] == row[name] for name in BUCKET_COLUMNS))
+        updated = connection.execute(table.update().where(match).values(
+            order_count=table.c.order_count + row['order_count'],
+            revenue=table.c.revenue + row['revenue']))
+        if not updated.rowcount:
+            connection.execute(table.insert(), [row])
+
+def append_deltas(connection, deltas):
+    """Queue {bucket: (count, revenue)} deltas for the next fold on connection"""
+    params = _delta_rows(deltas)
+    if params:
+        connection.execute(OrderRollupDelta.__table__.insert(), params)
+
+def _pending(session):
+    return session.info.setdefault('rollup_deltas', {})
+
+def record_orders(rows, session=None):
+    """Count orders inserted outside the ORM (bulk imports) in the current transaction"""
+    session = session or db.session
+    deltas = {}
+    for row in rows:
+        _add(deltas, row, 1)
+    append_deltas(session.connection(), deltas)
+    session.info.setdefault('rollup_days', set()).update(key[0] for key in deltas)
+
+def _load_previous(target, value, oldvalue, initiator):
+    pass
+
+# Load the previous value on assignment so a status change knows its old bucket
+for _field in TRACKED_FIELDS:
+    event.listen(getattr(Order, _field), 'set', _load_previous, active_history=True)
+
+def _current_values(target):
+    return {field: getattr(target, field) for field in TRACKED_FIELDS}
+
+def _previous_values(target):
+    state = db.inspect(target)
+    values, changed = {}, False
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field], changed = history.deleted[0], True
+        else:
+            values[field] = getattr(target, field)
+    return values if changed else None
+
+@event.listens_for(Order, 'after_insert')
+def _order_inserted(mapper, connection, target):
+    _add(_pending(db.inspect(target).session), _current_values(target), 1)
+
+@event.listens_for(Order, 'after_update')
+def _order_updated(mapper, connection, target):
+    previous = _previous_values(target)
+    if previous is None or previous['created_at'] is None:
+        return
+    deltas = _pending(db.inspect(target).session)
+    _add(deltas, previous, -1)
+    _add(deltas, _current_values(target), 1)
+
+@event.listens_for(Order, 'after_delete')
+def _order_deleted(mapper, connection, target):
+    _add(_pending(db.inspect(target).session), _current_values(target), -1)
+
+@event.listens_for(Session, 'after_flush')
+def _flush_deltas(session, flush_context):
+    deltas = session.info.pop('rollup_deltas', None)
+    if deltas:
+        append_deltas(session.connection(), deltas)
+        session.info.setdefault('rollup_days', set()).update(key[0] for key in deltas)
+
+@event.listens_for(Session, 'after_commit')
+def _notify_changes(session):
+    days = session.info.pop('rollup_days', None)
+    if days:
+        rollups_changed.send(app, days=days)
+        _schedule_fold()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('rollup_deltas', None)
+    session.info.pop('rollup_days', None)
+
+def _day(column, dialect_name):
+    # SQLite has no DATE type; date() yields the ISO string the Date column stores
+    if dialect_name == 'sqlite':
+        return db.func.date(column)
+    return db.cast(column, db.Date)
+
+@job
+def fold_rollup_deltas():
+    """Add the pending deltas to the rollup rows and drop them; returns how many were folded"""
+    table = OrderRollupDelta.__table__
+    columns = [table.c[name] for name in BUCKET_COLUMNS] + [table.c.order_count, table.c.revenue]
+    with db.engine.begin() as connection:
+        # Deleting claims the rows: a concurrent fold waits on them, then finds them gone
+        rows = connection.execute(table.delete().returning(*columns)).all()
+        deltas = {}
+        for *key, count, revenue in rows:
+            total_count, total_revenue = deltas.get(tuple(key), (0, 0.0))
+            deltas[tuple(key)] = (total_count + count, total_revenue + revenue)
+        apply_deltas(connection, deltas)
+    return len(rows)
+
+_last_fold = 0.0
+_fold_lock = threading.Lock()
+
+def _schedule_fold():
+    """Queue a fold when this worker has not queued one for ROLLUP_FOLD_INTERVAL seconds"""
+    global _last_fold
+    with _fold_lock:
+        now = time.monotonic()
+        if now - _last_fold < app.config['ROLLUP_FOLD_INTERVAL']:
+            return
+        _last_fold = now
+    enqueue('fold_rollup_deltas')
+
+def rollup_rows():
+    """Subquery of the rollup rows and the unfolded deltas, with the rollup columns; sum to read"""
+    names = list(BUCKET_COLUMNS) + ['order_count', 'revenue']
+    return db.union_all(
+        db.select(*(OrderDailyRollup.__table__.c[name] for name in names)),
+        db.select(*(OrderRollupDelta.__table__.c[name] for name in names)),
+    ).subquery('rollup_rows')
+
+def rebuild_rollups():
+    """Recompute every rollup row from the order table; returns the row count"""
+    with db.engine.begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            # Hold off order writes so none lands between the scan and the swap
+            connection.execute(db.text('LOCK TABLE "order" IN SHARE MODE'))
+        day = _day(Order.created_at, connection.dialect.name)
+        status = db.func.coalesce(Order.status, 'pending')
+        grouped = db.select(
+            day, status, Order.service_type, Order.plan_type,
+            db.func.count(Order.id), db.func.coalesce(db.func.sum(Order.total_amount), 0.0),
+        ).where(Order.created_at.isnot(None)) \
+            .group_by(day, status, Order.service_type, Order.plan_type)
+        table = OrderDailyRollup.__table__
+        # The rebuild counts every order, so pending deltas would count twice
+        connection.execute(OrderRollupDelta.__table__.delete())
+        connection.execute(table.delete())
+        connection.execute(table.insert().from_select(
+            list(BUCKET_COLUMNS) + ['order_count', 'revenue'], grouped))
+        rows = connection.execute(db.select(db.func.count()).select_from(table)).scalar()
+    rollups_changed.send(app, days=None)
+    logger.info('Rebuilt %d order rollup rows', rows)
+    return rows
+
+def rebuild_if_empty():
+    """Backfill the rollups when the table is empty but orders exist"""
+    if OrderDailyRollup.query.first() is None and OrderRollupDelta.query.first() is None \
+            and Order.query.first() is not None:
+        return rebuild_rollups()
+    return 0
+
+def order_kpis(today=None, session=None):
+    """Order counts and revenue for the dashboard, read from the rollup rows"""
+    rollup = rollup_rows().c
+    today = today or datetime.utcnow().date()
+    yesterday = today - timedelta(days=1)
+    last_week = today - timedelta(days=7)
+    last_month = today - timedelta(days=30)
+
+    def sum_if(condition, column):
+        return db.func.coalesce(db.func.sum(db.case((condition, column), else_=0)), 0)
+
+    row = (session or db.session).execute(db.select(
+        db.func.coalesce(db.func.sum(rollup.order_count), 0),
+        sum_if(rollup.day == today, rollup.order_count),
+        sum_if(rollup.day == yesterday, rollup.order_count),
+        sum_if(rollup.day >= last_week, rollup.order_count),
+        sum_if(rollup.day >= last_month, rollup.order_count),
+        sum_if(rollup.status == 'pending', rollup.order_count),
+        sum_if(rollup.status == 'in_progress', rollup.order_count),
+        sum_if(rollup.status == 'completed', rollup.order_count),
+        db.func.coalesce(db.func.sum(rollup.revenue), 0),
+        sum_if(rollup.day >= last_month, rollup.revenue),
+    )).one()
+
+    return dict(zip(('total_orders', 'orders_today', 'orders_yesterday', 'orders_week',
+                     'orders_month', 'pending_orders', 'in_progress_orders',
+                     'completed_orders', 'total_revenue', 'revenue_month'), row))
+
+@app.cli.command('fold-rollups')
+def fold_rollups_command():
+    """Fold pending order deltas into the daily rollups."""
+    click.echo(f'Folded {fold_rollup_deltas()} delta row(s)')
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the daily order rollups from the order table."""
+    rows = rebuild_rollups()
+    click.echo(f'Rebuilt {rows} rollup row(s)')
@@ -1,11 +1,14 @@
 from flask import render_template, request, redirect, url_for, flash, session, jsonify
 from app import app, db
-from models import Order, Feedback, BlogPost, User
-from data_store import get_services, get_pricing_plans, get_faq_data, get_blog_posts, get_stats
-from werkzeug.security import generate_password_hash
-import hashlib
-import json
-from datetime import datetime
+from models import Order, Feedback, BlogPost
+from data_store import (get_services, get_pricing_plans, get_faq_data, get_blog_posts,
+                        get_cached_stats, invalidate_stats)
+from page_cache import cached_page
+import search as search_engine
+from orders import new_order, order_committed
+from anchoring import verify_order_proof
+from replicas import read_only
+import ratelimit
 
 # Language handling
 @app.context_processor
@@ -19,17 +22,20 @@ def set_language(language):
 
 # Public routes
 @app.route('/')
+@read_only
 def index():
     """Homepage with hero section, stats, and video demo"""
-    stats = get_stats()
+    stats = get_cached_stats()
     return render_template('index.html', stats=stats)
 
 @app.route('/about')
+@cached_page()
 def about():
     """About page with timeline and team gallery"""
     return render_template('about.html')
 
 @app.route('/services')
+@cached_page('filter')
 def services():
     """Services page with flip-card grid"""
     services_data = get_services()
@@ -37,6 +43,7 @@ def services():
     return render_template('services.html', services=services_data, filter_type=filter_type)
 
 @app.route('/pricing')
+@cached_page()
 def pricing():
     """Pricing page with plan comparison"""
     plans = get_pricing_plans()
@@ -50,8 +57,9 @@ def order():
         step = request.form.get('step', '1')
         
         if step == '3':  # Final submission
-            # Create order
-            order = Order(
+            ratelimit.check('order', ip=request.remote_addr, email=request.form.get('customer_email'))
+            # Create order with its transaction hash in a single INSERT
+            order = new_order(
                 customer_name=request.form.get('customer_name'),
                 customer_email=request.form.get('customer_email'),
                 customer_phone=request.form.get('customer_phone'),
@@ -60,24 +68,15 @@ def order():
                 description=request.form.get('description'),
                 total_amount=float(request.form.get('total_amount', 0))
             )
+            tx_hash = order.tx_hash
             
             db.session.add(order)
+            db.session.flush()
+            order_id = order.id
             db.session.commit()
             
-            # Mock blockchain transaction
-            order_data = {
-                'id': order.id,
-                'customer': order.customer_name,
-                'service': order.service_type,
-                'plan': order.plan_type,
-                'timestamp': order.created_at.isoformat()
-            }
-            order_hash = hashlib.sha256(json.dumps(order_data, sort_keys=True).encode()).hexdigest()
-            
-            # Mock transaction hash (in real implementation, this would be from blockchain)
-            tx_hash = f"0x{hashlib.sha256(f'{order.id}{datetime.now()}'.encode()).hexdigest()}"
-            order.tx_hash = tx_hash
-            db.session.commit()
+            # Anchoring, confirmation email and stats refresh run in the background
+            order_committed(order_id)
             
             flash('Đơn hàng đã được tạo thành công! Mã giao dịch: ' + tx_hash, 'success')
             return redirect(url_for('verify_order', tx_hash=tx_hash))
@@ -87,6 +86,7 @@ def order():
     return render_template('order.html', services=services_data, plans=plans)
 
 @app.route('/verify/<tx_hash>')
+@read_only
 def verify_order(tx_hash):
     """Order verification page"""
     order = Order.query.filter_by(tx_hash=tx_hash).first()
@@ -94,21 +94,27 @@ def verify_order(tx_hash):
         flash('Không tìm thấy đơn hàng với mã giao dịch này.', 'error')
         return redirect(url_for('index'))
     
-    return render_template('verify.html', order=order)
+    # Membership check against the anchored Merkle root, no chain call needed
+    anchor_status, anchor_batch = verify_order_proof(order)
+    return render_template('verify.html', order=order,
+                           anchor_status=anchor_status, anchor_batch=anchor_batch)
 
 @app.route('/faq')
+@cached_page()
 def faq():
     """FAQ page with accordion"""
     faq_data = get_faq_data()
     return render_template('faq.html', faqs=faq_data)
 
 @app.route('/blog')
+@cached_page()
 def blog():
     """Blog listing page"""
     posts = get_blog_posts()
     return render_template('blog.html', posts=posts)
 
 @app.route('/blog/<slug>')
+@read_only
 def blog_post(slug):
     """Individual blog post page"""
     post = BlogPost.query.filter_by(slug=slug, published=True).first_or_404()
@@ -118,6 +124,7 @@ def blog_post(slug):
 def contact():
     """Contact page with feedback form"""
     if request.method == 'POST':
+        ratelimit.check('contact', ip=request.remote_addr, email=request.form.get('email'))
         feedback = Feedback(
             name=request.form.get('name'),
             email=request.form.get('email'),
@@ -126,129 +133,31 @@ def contact():
         )
         db.session.add(feedback)
         db.session.commit()
+        invalidate_stats()
         
         flash('Cảm ơn bạn đã gửi phản hồi! Chúng tôi sẽ liên hệ lại sớm.', 'success')
         return redirect(url_for('contact'))
     
     return render_template('contact.html')
 
-# Admin routes
-@app.route('/admin/login', methods=['GET', 'POST'])
-def admin_login():
-    """Admin login page"""
-    if request.method == 'POST':
-        username = request.form.get('username')
-        password = request.form.get('password')
-        
-        # Simple admin check (in production, use proper authentication)
-        if username == 'admin' and password == 'admin123':
-            session['admin_logged_in'] = True
-            flash('Đăng nhập thành công!', 'success')
-            return redirect(url_for('admin_dashboard'))
-        else:
-            flash('Tên đăng nhập hoặc mật khẩu không đúng.', 'error')
-    
-    return render_template('admin/login.html')
-
-@app.route('/admin/logout')
-def admin_logout():
-    """Admin logout"""
-    session.pop('admin_logged_in', None)
-    flash('Đã đăng xuất thành công.', 'info')
-    return redirect(url_for('index'))
-
-def admin_required(f):
-    """Decorator to require admin login"""
-    def decorated_function(*args, **kwargs):
-        if not session.get('admin_logged_in'):
-            flash('Vui lòng đăng nhập để truy cập trang quản trị.', 'error')
-            return redirect(url_for('admin_login'))
-        return f(*args, **kwargs)
-    decorated_function.__name__ = f.__name__
-    return decorated_function
-
-@app.route('/admin')
-@admin_required
-def admin_dashboard():
-    """Admin dashboard with KPIs"""
-    stats = get_stats()
-    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
-    recent_feedbacks = Feedback.query.order_by(Feedback.created_at.desc()).limit(5).all()
-    
-    return render_template('admin/dashboard.html', 
-                         stats=stats, 
-                         recent_orders=recent_orders, 
-                         recent_feedbacks=recent_feedbacks)
-
-@app.route('/admin/orders')
-@admin_required
-def admin_orders():
-    """Admin orders management"""
-    status_filter = request.args.get('status', 'all')
-    page = request.args.get('page', 1, type=int)
-    
-    query = Order.query
-    if status_filter != 'all':
-        query = query.filter_by(status=status_filter)
-    
-    orders = query.order_by(Order.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False)
-    
-    return render_template('admin/orders.html', orders=orders, status_filter=status_filter)
-
-@app.route('/admin/orders/<int:order_id>/update_status', methods=['POST'])
-@admin_required
-def update_order_status(order_id):
-    """Update order status"""
-    order = Order.query.get_or_404(order_id)
-    new_status = request.form.get('status')
-    
-    if new_status in ['pending', 'in_progress', 'completed']:
-        order.status = new_status
-        order.updated_at = datetime.utcnow()
-        db.session.commit()
-        flash(f'Đã cập nhật trạng thái đơn hàng #{order.id}', 'success')
-    
-    return redirect(url_for('admin_orders'))
-
-@app.route('/admin/feedbacks')
-@admin_required
-def admin_feedbacks():
-    """Admin feedbacks management"""
-    page = request.args.get('page', 1, type=int)
-    feedbacks = Feedback.query.order_by(Feedback.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False)
-    
-    return render_template('admin/feedbacks.html', feedbacks=feedbacks)
-
-@app.route('/admin/feedbacks/<int:feedback_id>/process', methods=['POST'])
-@admin_required
-def process_feedback(feedback_id):
-    """Mark feedback as processed"""
-    feedback = Feedback.query.get_or_404(feedback_id)
-    feedback.is_processed = True
-    db.session.commit()
-    
-    flash(f'Đã đánh dấu phản hồi #{feedback.id} đã xử lý', 'success')
-    return redirect(url_for('admin_feedbacks'))
-
 # Search functionality
 @app.route('/search')
+@read_only
 def search():
     """Search functionality"""
     query = request.args.get('q', '')
     if not query:
         return redirect(url_for('index'))
+    page = request.args.get('page', 1, type=int)
     
-    # Search in blog posts and services
-    blog_results = BlogPost.query.filter(
-        BlogPost.title.contains(query) | BlogPost.content.contains(query),
-        BlogPost.published == True
-    ).all()
+    # Ranked search over blog posts, services and FAQ
+    results = search_engine.search(query, page=page)
     
     return render_template('search_results.html', 
                          query=query, 
-                         blog_results=blog_results)
+                         blog_results=results.blog_results,
+                         catalog_results=results.catalog_results,
+                         results=results)
 
 # Error handlers
 @app.errorhandler(404)
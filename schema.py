@@ -0,0 +1,118 @@
+"""
+Schema management for UEHer application
+`flask --app main migrate` creates missing tables, drops NOT NULL from columns
+that became optional, and builds any index declared on the models (or by
+search/admin_search) that the database does not have yet.
+On PostgreSQL new indexes are built with CREATE INDEX CONCURRENTLY so the
+tables stay writable while they build.
+"""
+
+import logging
+import click
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateTable
+from app import app, db
+from rollups import rebuild_if_empty
+
+logger = logging.getLogger(__name__)
+
+def existing_index_names(connection):
+    """Names of the indexes present in the database, including expression indexes"""
+    if connection.dialect.name == 'postgresql':
+        query = "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+    elif connection.dialect.name == 'sqlite':
+        query = "SELECT name FROM sqlite_master WHERE type = 'index'"
+    else:
+        inspector = inspect(connection)
+        return {index['name'] for table in inspector.get_table_names()
+                for index in inspector.get_indexes(table)}
+    return set(connection.execute(db.text(query)).scalars())
+
+def missing_indexes(connection):
+    """Indexes declared in the metadata that do not exist in the database"""
+    existing = existing_index_names(connection)
+    tables = set(inspect(connection).get_table_names())
+    return [index for table in db.metadata.sorted_tables if table.name in tables
+            for index in sorted(table.indexes, key=lambda ix: ix.name)
+            if index.name not in existing]
+
+def create_indexes(online=True):
+    """Build missing indexes, concurrently on PostgreSQL when online is set
+
+    A concurrent build that fails leaves an INVALID index behind; drop it
+    before running the migration again.
+    """
+    engine = db.engine
+    concurrently = online and engine.dialect.name == 'postgresql'
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    options = {'isolation_level': 'AUTOCOMMIT'} if concurrently else {}
+    with engine.connect().execution_options(**options) as connection:
+        before = existing_index_names(connection)
+        for index in missing_indexes(connection):
+            index.dialect_kwargs['postgresql_concurrently'] = concurrently
+            try:
+                # Indexes limited to another dialect (ddl_if) are skipped here
+                index.create(connection)
+            finally:
+                index.dialect_kwargs['postgresql_concurrently'] = False
+        if not concurrently:
+            connection.commit()
+        created = sorted(existing_index_names(connection) - before)
+    for name in created:
+        logger.info('Created index %s', name)
+    return created
+
+# Columns declared NOT NULL when their table was first created and nullable since
+RELAXED_COLUMNS = (
+    ('anchor_batch', 'chain_tx'),
+)
+
+def _rebuild_sqlite_table(connection, table):
+    """Recreate table from its declaration keeping the rows; SQLite cannot alter a column"""
+    ddl = str(CreateTable(table).compile(connection))
+    connection.exec_driver_sql(ddl.replace(f'CREATE TABLE {table.name} ',
+                                           f'CREATE TABLE _new_{table.name} ', 1))
+    columns = ', '.join(column.name for column in table.columns)
+    connection.exec_driver_sql(f'INSERT INTO _new_{table.name} ({columns}) '
+                               f'SELECT {columns} FROM {table.name}')
+    # Its indexes go with it and are rebuilt by create_indexes()
+    connection.exec_driver_sql(f'DROP TABLE {table.name}')
+    connection.exec_driver_sql(f'ALTER TABLE _new_{table.name} RENAME TO {table.name}')
+
+def relax_columns(connection):
+    """Drop NOT NULL from the RELAXED_COLUMNS that still have it"""
+    inspector = inspect(connection)
+    for table_name, column_name in RELAXED_COLUMNS:
+        if not inspector.has_table(table_name):
+            continue
+        column = next(column for column in inspector.get_columns(table_name)
+                      if column['name'] == column_name)
+        if column['nullable']:
+            continue
+        if connection.dialect.name == 'sqlite':
+            _rebuild_sqlite_table(connection, db.metadata.tables[table_name])
+        else:
+            connection.execute(db.text(f'ALTER TABLE {table_name} ALTER COLUMN {column_name} '
+                                       'DROP NOT NULL'))
+        logger.info('Made %s.%s nullable', table_name, column_name)
+
+def upgrade_schema(online=True):
+    """Create missing tables, replay the schema hooks, then build missing indexes"""
+    with db.engine.begin() as connection:
+        relax_columns(connection)
+        db.metadata.create_all(connection)
+        # Extensions, helper functions and FTS tables for tables that already existed
+        db.metadata.dispatch.before_create(db.metadata, connection, checkfirst=True, tables=[])
+        for table in db.metadata.sorted_tables:
+            table.dispatch.after_create(table, connection, checkfirst=True)
+    return create_indexes(online=online)
+
+@app.cli.command('migrate')
+@click.option('--online/--offline', default=True,
+              help='Build PostgreSQL indexes concurrently (default) or with table locks.')
+def migrate_command(online):
+    """Create missing tables and indexes."""
+    created = upgrade_schema(online=online)
+    click.echo(f'Created {len(created)} index(es): {", ".join(created) or "none"}')
+    if rebuild_if_empty():
+        click.echo('Backfilled the daily order rollups')
@@ -0,0 +1,302 @@
+"""
+Full-text search for UEHer application
+Blog posts, services and FAQ entries are matched through an inverted index with
+Vietnamese diacritic folding and BM25 ranking. On PostgreSQL, blog posts are
+searched with a GIN-indexed tsvector instead of the in-process index.
+"""
+
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from sqlalchemy import event, DDL
+from sqlalchemy.dialects import postgresql  # noqa: F401  (registers the to_tsvector family)
+from sqlalchemy.orm import Session
+import catalog
+from app import app, db
+from models import BlogPost
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Text search configuration; 'simple' because stems are language-specific and
+# documents mix Vietnamese and English. Literal so it can appear in index DDL.
+_TS_CONFIG = db.text("'simple'::regconfig")
+
+# Title matches count three times, excerpt twice, body once
+BLOG_FIELD_WEIGHTS = (('title', 3), ('excerpt', 2), ('content', 1))
+
+def fold(text):
+    """Lowercase and strip Vietnamese diacritics ('Quản lý' -> 'quan ly')"""
+    text = (text or '').replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', text)
+    return ''.join(ch for ch in decomposed if unicodedata.category(ch) != 'Mn').lower()
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+class InvertedIndex:
+    """In-process inverted index with BM25 scoring and incremental updates"""
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def doc_ids(self):
+        with self._lock:
+            return set(self._doc_lengths)
+
+    def add(self, doc_id, weighted_fields):
+        """Index a document given (text, weight) pairs, replacing any previous version"""
+        terms = Counter()
+        for text, weight in weighted_fields:
+            for token in tokenize(text):
+                terms[token] += weight
+        with self._lock:
+            self._remove(doc_id)
+            for term, freq in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = freq
+            length = sum(terms.values())
+            self._doc_terms[doc_id] = tuple(terms)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+
+    def search(self, query):
+        """Return (doc_id, score) pairs ranked by BM25, best first"""
+        terms = set(tokenize(query))
+        scores = Counter()
+        with self._lock:
+            n_docs = len(self._doc_lengths)
+            if not n_docs or not terms:
+                return []
+            avg_length = self._total_length / n_docs
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, freq in postings.items():
+                    norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length
+                    scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + self.k1 * norm)
+        return scores.most_common()
+
+
+@dataclass(frozen=True, slots=True)
+class SearchResults:
+    blog_results: list
+    catalog_results: list
+    total: int
+    page: int
+    per_page: int
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page))
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+
+def _build_catalog_index():
+    index = InvertedIndex()
+    for service in catalog.SERVICES:
+        index.add(('service', service.id), [
+            (f'{service.name} {service.name_en}', 3),
+            (f'{service.description} {service.description_en}', 1),
+            (' '.join(service.features + service.features_en), 1),
+        ])
+    for position, faq in enumerate(catalog.FAQS):
+        index.add(('faq', position), [
+            (f'{faq.question} {faq.question_en}', 2),
+            (f'{faq.answer} {faq.answer_en}', 1),
+        ])
+    return index
+
+_catalog_index = _build_catalog_index()
+_catalog_docs = {('service', service.id): service for service in catalog.SERVICES}
+_catalog_docs.update({('faq', position): faq for position, faq in enumerate(catalog.FAQS)})
+
+
+class BlogIndex:
+    """Blog post index for backends without native full-text search
+
+    Commits in this worker are applied immediately; changes made by other
+    workers are picked up incrementally once SEARCH_INDEX_REFRESH seconds pass.
+    """
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._index = InvertedIndex()
+        self._synced_at = None
+        self._signature = None
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def add_post(self, post):
+        self.index_post(post.id, post.published, {field: getattr(post, field)
+                                                  for field, _ in BLOG_FIELD_WEIGHTS})
+
+    def index_post(self, post_id, published, fields):
+        if published:
+            self._index.add(post_id, [(fields[field], weight) for field, weight in BLOG_FIELD_WEIGHTS])
+        else:
+            self._index.remove(post_id)
+
+    def remove_post(self, post_id):
+        self._index.remove(post_id)
+        self._versions.pop(post_id, None)
+
+    def search(self, query):
+        self._sync()
+        return self._index.search(query)
+
+    def _sync(self):
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < self.refresh_interval:
+            return
+        with self._lock:
+            signature = tuple(db.session.query(
+                db.func.count(BlogPost.id), db.func.max(BlogPost.updated_at)
+            ).filter(BlogPost.published == True).one())  # noqa: E712
+            if signature != self._signature:
+                # Compare versions per post: an update can carry an updated_at equal
+                # to or older than the newest one already indexed
+                live = dict(db.session.query(BlogPost.id, BlogPost.updated_at).filter(
+                    BlogPost.published == True))  # noqa: E712
+                changed = [post_id for post_id, updated_at in live.items()
+                           if post_id not in self._versions or self._versions[post_id] != updated_at]
+                for start in range(0, len(changed), 500):
+                    for post in BlogPost.query.filter(BlogPost.id.in_(changed[start:start + 500])):
+                        self.add_post(post)
+                        self._versions[post.id] = post.updated_at
+                # Drop posts deleted or unpublished elsewhere
+                for post_id in set(self._versions) - set(live):
+                    self.remove_post(post_id)
+                self._signature = signature
+            self._synced_at = now
+
+_blog_index = BlogIndex(app.config['SEARCH_INDEX_REFRESH'])
+
+
+def use_postgres():
+    """Whether blog posts are searched with PostgreSQL full-text search"""
+    backend = app.config['SEARCH_BACKEND']
+    if backend == 'auto':
+        return db.engine.dialect.name == 'postgresql'
+    return backend == 'postgres'
+
+def _blog_document():
+    # Literals are inlined so the query expression matches the index expression
+    space = db.literal(' ', literal_execute=True)
+    return db.func.to_tsvector(_TS_CONFIG, db.func.f_unaccent(
+        BlogPost.title + space + db.func.coalesce(BlogPost.excerpt, db.literal('', literal_execute=True))
+        + space + BlogPost.content))
+
+def postgres_blog_statements(query, page, per_page):
+    """(count, page) statements for a full-text blog search on PostgreSQL"""
+    ts_query = db.func.plainto_tsquery(_TS_CONFIG, db.func.f_unaccent(query))
+    document = _blog_document()
+    match = db.and_(BlogPost.published == True, document.op('@@')(ts_query))  # noqa: E712
+    count = db.select(db.func.count()).select_from(BlogPost).where(match)
+    posts = db.select(BlogPost).where(match) \
+        .order_by(db.func.ts_rank_cd(document, ts_query).desc(), BlogPost.id.desc()) \
+        .offset((page - 1) * per_page).limit(per_page)
+    return count, posts
+
+def _search_blog_postgres(query, page, per_page):
+    count, posts = postgres_blog_statements(query, page, per_page)
+    return db.session.scalars(posts).all(), db.session.scalar(count)
+
+def rank_blog_posts(query):
+    """[(post_id, score)] from the in-process index, best first"""
+    return _blog_index.search(query)
+
+def page_ids(ranked, page, per_page):
+    """Post ids on one page of rank_blog_posts() results"""
+    return [doc_id for doc_id, _ in ranked[(page - 1) * per_page:page * per_page]]
+
+def _search_blog_memory(query, page, per_page):
+    ranked = rank_blog_posts(query)
+    ids = page_ids(ranked, page, per_page)
+    if not ids:
+        return [], len(ranked)
+    by_id = {post.id: post for post in BlogPost.query.filter(BlogPost.id.in_(ids))}
+    return [by_id[post_id] for post_id in ids if post_id in by_id], len(ranked)
+
+def search_catalog(query, limit=5):
+    """Top services and FAQ entries for query"""
+    return [_catalog_docs[doc_id] for doc_id, _ in _catalog_index.search(query)[:limit]]
+
+def search(query, page=1, per_page=10, catalog_limit=5):
+    """Search blog posts (paginated) and the static catalog (top matches)"""
+    page = max(page, 1)
+    if use_postgres():
+        posts, total = _search_blog_postgres(query, page, per_page)
+    else:
+        posts, total = _search_blog_memory(query, page, per_page)
+    return SearchResults(posts, search_catalog(query, catalog_limit), total, page, per_page)
+
+
+# Keep this worker's in-process index in step with committed BlogPost changes
+@event.listens_for(Session, 'after_flush')
+def _collect_blog_changes(session, flush_context):
+    # Snapshot the indexed fields now; objects are expired once the commit ends
+    pending = session.info.setdefault('search_pending', {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, BlogPost):
+            pending[obj.id] = (obj.published, {field: getattr(obj, field)
+                                               for field, _ in BLOG_FIELD_WEIGHTS})
+    for obj in session.deleted:
+        if isinstance(obj, BlogPost):
+            pending[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_blog_changes(session):
+    for post_id, snapshot in session.info.pop('search_pending', {}).items():
+        if snapshot is None:
+            _blog_index.remove_post(post_id)
+        else:
+            _blog_index.index_post(post_id, *snapshot)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_blog_changes(session):
+    session.info.pop('search_pending', None)
+
+
+# PostgreSQL: unaccent() is not IMMUTABLE, so wrap it to make it usable in the GIN index
+event.listen(db.metadata, 'before_create', DDL(
+    "CREATE EXTENSION IF NOT EXISTS unaccent; "
+    "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+    "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+).execute_if(dialect='postgresql'))
+db.Index('ix_blog_post_search', _blog_document(), postgresql_using='gin').ddl_if(dialect='postgresql')
@@ -0,0 +1,126 @@
+"""
+Session storage for UEHer application
+SESSION_BACKEND "cookie" keeps Flask's signed-cookie sessions. "memory" (one
+process only) and "redis" keep the data server-side; the cookie carries just a
+random session id. Sessions are only written when they change, so
+anonymous page views never touch the store.
+"""
+
+import secrets
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+from cache import TTLCache
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session data loaded from a store under sid"""
+
+    def __init__(self, data=None, sid=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(data, on_update)
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.rotate = False
+
+def rotate_session(session):
+    """Move the session to a fresh id (after login), dropping the old record"""
+    if isinstance(session, ServerSession):
+        session.rotate = True
+        session.modified = True
+
+class MemoryStore:
+    """Per-process store for development and single-worker servers
+
+    Holds at most max_entries sessions; beyond that the least recently saved
+    one is dropped, so abandoned sessions cannot grow the process unbounded.
+    """
+
+    def __init__(self, lifetime, max_entries):
+        self._data = TTLCache(ttl=lifetime, maxsize=max_entries)
+
+    def get(self, sid):
+        return self._data.get(sid)
+
+    def set(self, sid, value, ttl):
+        # Re-insert so a session saved again moves behind the ones eviction drops first
+        self._data.delete(sid)
+        self._data.set(sid, value, ttl)
+
+    def delete(self, sid):
+        self._data.delete(sid)
+
+class RedisStore:
+    """Store shared by every worker"""
+
+    def __init__(self, client, prefix='ueher:session:'):
+        self.prefix = prefix
+        self._client = client
+
+    def get(self, sid):
+        return self._client.get(self.prefix + sid)
+
+    def set(self, sid, value, ttl):
+        self._client.set(self.prefix + sid, value, ex=max(1, int(ttl)))
+
+    def delete(self, sid):
+        self._client.delete(self.prefix + sid)
+
+class ServerSessionInterface(SessionInterface):
+    """Keeps session data in a store, keyed by an id in the session cookie"""
+
+    serializer = session_json_serializer
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            payload = self.store.get(sid)
+            if payload is not None:
+                try:
+                    return ServerSession(self.serializer.loads(payload), sid)
+                except ValueError:
+                    pass
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name, domain, path = self.get_cookie_name(app), self.get_cookie_domain(app), \
+            self.get_cookie_path(app)
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+        if session.rotate and session.sid:
+            self.store.delete(session.sid)
+        if session.new or session.rotate:
+            session.sid, session.rotate = secrets.token_urlsafe(32), False
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        self.store.set(session.sid, self.serializer.dumps(dict(session)), lifetime)
+        response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                            secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+        response.vary.add('Cookie')
+
+def configure_sessions(app):
+    """Install the SESSION_BACKEND session interface on app"""
+    backend = app.config['SESSION_BACKEND']
+    if backend == 'cookie':
+        return
+    if backend == 'memory':
+        store = MemoryStore(app.permanent_session_lifetime.total_seconds(),
+                            app.config['SESSION_MEMORY_MAX_ENTRIES'])
+    elif backend == 'redis':
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImportError("SESSION_BACKEND=redis needs the 'redis' package") from exc
+        store = RedisStore(redis.Redis.from_url(app.config['SESSION_REDIS_URL'],
+                                                socket_timeout=0.5, socket_connect_timeout=0.5))
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND '{backend}', expected cookie, memory or redis")
+    app.session_interface = ServerSessionInterface(store)
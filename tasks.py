@@ -0,0 +1,83 @@
+"""
+Background job queue for UEHer application
+Post-commit work (anchoring, emails, cache invalidation) runs outside the
+request thread. TASK_BACKEND selects where jobs run: "thread" (a local worker
+pool, the default) or "inline" (immediately, for tests and scripts). Other
+backends can be added with register_backend().
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app import app
+
+logger = logging.getLogger(__name__)
+
+_jobs = {}
+_backends = {}
+_backend = None
+_backend_lock = threading.Lock()
+
+def job(f):
+    """Register a function as a job that can be enqueued by name"""
+    _jobs[f.__name__] = f
+    return f
+
+def run_job(name, kwargs):
+    """Run a registered job inside an application context, logging failures"""
+    with app.app_context():
+        try:
+            _jobs[name](**kwargs)
+        except Exception:
+            logger.exception('Job %s failed with %r', name, kwargs)
+
+class InlineBackend:
+    """Runs each job immediately in the calling thread"""
+
+    def submit(self, name, kwargs):
+        run_job(name, kwargs)
+
+    def shutdown(self, wait=True):
+        pass
+
+class ThreadPoolBackend:
+    """Runs jobs on a per-process pool of worker threads"""
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ueh-task')
+
+    def submit(self, name, kwargs):
+        self._executor.submit(run_job, name, kwargs)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+def register_backend(name, factory):
+    """Make a backend available to TASK_BACKEND; factory receives the app config"""
+    _backends[name] = factory
+
+register_backend('inline', lambda config: InlineBackend())
+register_backend('thread', lambda config: ThreadPoolBackend(config['TASK_WORKERS']))
+
+def get_backend():
+    """The configured backend, created on first use in each process"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _backends[app.config['TASK_BACKEND']](app.config)
+    return _backend
+
+def reset_backend(wait=True):
+    """Shut the current backend down; the next enqueue creates a fresh one"""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.shutdown(wait=wait)
+        _backend = None
+
+def enqueue(name, **kwargs):
+    """Queue a registered job; call only after the data it needs is committed"""
+    if name not in _jobs:
+        raise KeyError(f'Unknown job: {name}')
+    get_backend().submit(name, kwargs)
@@ -0,0 +1,74 @@
+"""
+Template compilation and fragment caching for UEHer application
+Compiled templates are kept in a FileSystemBytecodeCache that every worker on
+the host shares, so only the first process to load a template parses it.
+Catalog-driven blocks can be wrapped in
+    {% cache 'pricing-cards' %}...{% endcache %}
+to render them once per language and catalog.VERSION; extra arguments after
+the name (e.g. a filter value) become part of the key.
+"""
+
+import logging
+import click
+from flask import has_request_context
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.exceptions import TemplateError
+from jinja2.ext import Extension
+import catalog
+from app import app
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_fragment_cache = TTLCache(ttl=app.config['FRAGMENT_CACHE_TTL'], maxsize=1024)
+
+def _current_language():
+    if not has_request_context():
+        return 'vi'
+    from routes import inject_language
+    return inject_language()['current_lang']
+
+class FragmentCacheExtension(Extension):
+    """{% cache name[, vary...] %}: keep the rendered block per language and catalog version"""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cached_block', [nodes.List(parts)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _cached_block(self, parts, caller):
+        key = (tuple(parts), _current_language(), catalog.VERSION)
+        return _fragment_cache.get_or_set(key, caller)
+
+def fragment_cache_info():
+    """Hit/miss counters of the template fragment cache for this worker"""
+    return _fragment_cache.info()
+
+def clear_fragment_cache():
+    _fragment_cache.clear()
+
+def precompile_templates():
+    """Load every template into the environment (and the bytecode cache); returns the count"""
+    env = app.jinja_env
+    loaded = 0
+    for name in env.list_templates(extensions=('html', 'txt', 'xml')):
+        try:
+            env.get_template(name)
+            loaded += 1
+        except TemplateError:
+            logger.exception('Could not compile template %s', name)
+    return loaded
+
+app.jinja_env.add_extension(FragmentCacheExtension)
+if app.config['JINJA_BYTECODE_CACHE']:
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+
+@app.cli.command('compile-templates')
+def compile_templates_command():
+    """Compile all templates into the shared bytecode cache."""
+    click.echo(f'Compiled {precompile_templates()} template(s)')
@@ -0,0 +1,58 @@
+"""
+Shared fixtures
+The application reads its configuration when app.py is imported, so the
+environment is set first: a temporary primary and replica SQLite database,
+inline jobs, no rate limits and a private anchor ledger.
+"""
+
+import os
+import shutil
+import tempfile
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix='ueher-tests-')
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(_tmp, 'primary.db'),
+    'DATABASE_REPLICA_URLS': 'sqlite:///' + os.path.join(_tmp, 'replica.db'),
+    'AUTO_MIGRATE': '0',
+    'TASK_BACKEND': 'inline',
+    'RATE_LIMIT_ENABLED': '0',
+    'RATE_LIMIT_BACKEND': 'memory',
+    'ANCHOR_LEDGER_PATH': os.path.join(_tmp, 'anchor-ledger.jsonl'),
+    'LOG_LEVEL': 'WARNING',
+})
+
+from app import app as flask_app, db  # noqa: E402
+import schema  # noqa: E402
+
+@pytest.fixture(scope='session', autouse=True)
+def database():
+    """Migrate the primary and give the replica the same (empty) tables"""
+    with flask_app.app_context():
+        schema.upgrade_schema(online=False)
+        for name, engine in db.engines.items():
+            if name:
+                db.metadata.create_all(engine)
+    yield
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+@pytest.fixture
+def app():
+    """The application; every database is emptied after the test"""
+    yield flask_app
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            with engine.begin() as connection:
+                for table in reversed(db.metadata.sorted_tables):
+                    connection.execute(table.delete())
+
+@pytest.fixture
+def app_context(app):
+    """An application context for the test body (requests made by a client push their own)"""
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
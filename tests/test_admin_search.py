@@ -0,0 +1,38 @@
+import pytest
+from app import db
+from admin_search import looks_like_phone, order_search_filter
+from models import Order
+
+def add_order(name, email, phone=None):
+    db.session.add(Order(customer_name=name, customer_email=email, customer_phone=phone,
+                         service_type='web', plan_type='basic'))
+    db.session.commit()
+
+def search(term):
+    return [order.customer_name for order in Order.query.filter(order_search_filter(term))]
+
+@pytest.mark.parametrize('term', ['+84 912 345 678', '0912345678', '0912-345-678', '(028) 3822 1234'])
+def test_phone_shaped_terms(term):
+    assert looks_like_phone(term)
+
+@pytest.mark.parametrize('term', ['2024-01-15', '12345678', '20240115', '0123', '+84 12'])
+def test_dates_and_ids_are_not_phones(term):
+    assert not looks_like_phone(term)
+
+def test_phone_search_matches_stored_number(app, app_context):
+    add_order('Khách A', 'a@example.com', '0912345678')
+    add_order('Khách B', 'b@example.com', '0987654321')
+
+    assert search('0912 345 678') == ['Khách A']
+
+def test_date_and_id_terms_use_text_search(app, app_context):
+    add_order('Khách 2024-01-15', 'a@example.com')
+    add_order('Khách B', 'don12345678@example.com')
+
+    assert search('2024-01-15') == ['Khách 2024-01-15']
+    assert search('12345678') == ['Khách B']
+
+def test_unknown_phone_falls_back_to_text_search(app, app_context):
+    add_order('Khách C', 'c0912345678@example.com', '0900000000')
+
+    assert search('0912345678') == ['Khách C']
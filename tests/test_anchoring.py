@@ -0,0 +1,69 @@
+import json
+import pytest
+import anchoring
+import merkle
+from anchoring import LocalChain, anchor_pending_orders, claim_batch, publish_unanchored, \
+    verify_order_proof
+from app import db
+from models import AnchorBatch, OrderProof
+from orders import new_order
+
+@pytest.fixture
+def orders(app_context):
+    orders = [new_order(customer_name=f'Khách {i}', customer_email=f'khach{i}@example.com',
+                        service_type='schedule', plan_type='basic', total_amount=10.0 * i)
+              for i in range(5)]
+    db.session.add_all(orders)
+    db.session.commit()
+    return orders
+
+def test_anchor_and_verify_round_trip(orders):
+    batch = anchor_pending_orders()
+
+    assert batch.leaf_count == len(orders)
+    assert anchoring.chain.get_root(batch.chain_tx) == batch.merkle_root
+    assert [verify_order_proof(order) for order in orders] == [('verified', batch)] * len(orders)
+    assert anchor_pending_orders() is None
+
+def test_ledger_is_shared_through_the_file(app, orders):
+    batch = anchor_pending_orders()
+
+    # Another worker's chain client reads the root back from the ledger
+    assert LocalChain(app.config['ANCHOR_LEDGER_PATH']).get_root(batch.chain_tx) == batch.merkle_root
+
+def test_claimed_batch_is_pending_until_published(orders):
+    batch_id = claim_batch()
+
+    assert verify_order_proof(orders[0]) == ('pending', None)
+    assert publish_unanchored() == 1
+    assert verify_order_proof(orders[0])[0] == 'verified'
+    assert db.session.get(AnchorBatch, batch_id).chain_tx is not None
+
+def test_edited_order_is_invalid(orders):
+    anchor_pending_orders()
+    orders[2].total_amount = 0.0
+    db.session.commit()
+
+    assert verify_order_proof(orders[2])[0] == 'invalid'
+    assert verify_order_proof(orders[3])[0] == 'verified'
+
+def test_rewritten_batch_does_not_verify(orders):
+    batch = anchor_pending_orders()
+    # Edit an order and rewrite its batch as a single-leaf tree that matches it
+    order = orders[0]
+    order.total_amount = 0.0
+    db.session.flush()
+    proof = db.session.scalars(db.select(OrderProof).filter_by(order_id=order.id)).one()
+    proof.proof = json.dumps([])
+    proof.leaf_index = 0
+    batch.merkle_root = merkle.merkle_root(merkle.build_levels([bytes.fromhex(anchoring.order_digest(order))]))
+    db.session.commit()
+
+    assert verify_order_proof(order) == ('invalid', batch)
+
+def test_unknown_chain_transaction_is_invalid(orders):
+    batch = anchor_pending_orders()
+    batch.chain_tx = '0x' + '0' * 64
+    db.session.commit()
+
+    assert verify_order_proof(orders[0])[0] == 'invalid'
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import pytest
+
+pytest.importorskip('aiosqlite')
+asgi = pytest.importorskip('asgi')
+
+import anchoring  # noqa: E402
+from anchoring import anchor_pending_orders  # noqa: E402
+from app import db  # noqa: E402
+from orders import new_order  # noqa: E402
+
+class RecordingChain:
+    """Chain client that remembers which threads looked roots up"""
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.threads = []
+
+    def anchor(self, root):
+        return self.chain.anchor(root)
+
+    def get_root(self, tx_id):
+        self.threads.append(threading.current_thread())
+        return self.chain.get_root(tx_id)
+
+@pytest.fixture
+def recording_chain():
+    original = anchoring.chain
+    recording = RecordingChain(original)
+    anchoring.set_chain(recording)
+    anchoring._chain_roots.clear()
+    yield recording
+    anchoring.set_chain(original)
+    anchoring._chain_roots.clear()
+
+async def render_verify(tx_hash):
+    try:
+        async with asgi.AsyncSession(asgi._engine(None), expire_on_commit=False) as session:
+            return await asgi.verify_order(session, tx_hash)
+    finally:
+        await asgi.dispose_engines()
+
+def test_verify_order_looks_up_the_chain_off_the_event_loop(app_context, recording_chain, monkeypatch):
+    order = new_order(customer_name='Khách', customer_email='khach@example.com',
+                      service_type='schedule', plan_type='basic', total_amount=10.0)
+    db.session.add(order)
+    db.session.commit()
+    tx_hash = order.tx_hash
+    batch_id = anchor_pending_orders().id
+    monkeypatch.setattr(asgi, 'render_template', lambda name, **context: context)
+
+    context = asyncio.run(render_verify(tx_hash))
+
+    assert context['anchor_status'] == 'verified'
+    assert context['anchor_batch'].id == batch_id
+    assert recording_chain.threads and threading.main_thread() not in recording_chain.threads
@@ -0,0 +1,45 @@
+import threading
+import time
+import pytest
+import auth
+from auth import VerifierBusy, verify_password
+
+@pytest.fixture
+def slow_check(monkeypatch):
+    """check_password_hash that blocks until the test releases it"""
+    release = threading.Event()
+    monkeypatch.setattr(auth, 'check_password_hash', lambda password_hash, password: release.wait(5))
+    yield release
+    release.set()
+
+def test_saturated_verifier_refuses_at_once(app, slow_check):
+    capacity = app.config['AUTH_HASH_WORKERS'] + app.config['AUTH_HASH_BACKLOG']
+    with app.app_context():
+        threads = [threading.Thread(target=verify_password, args=('hash', 'password'))
+                   for _ in range(capacity)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while auth._verifier_slots._value and time.monotonic() < deadline:
+            time.sleep(0.001)
+        try:
+            with pytest.raises(VerifierBusy):
+                verify_password('hash', 'password')
+        finally:
+            slow_check.set()
+            for thread in threads:
+                thread.join()
+        # Every slot is returned once the checks finish
+        assert verify_password('hash', 'password') is True
+
+def test_slow_check_times_out(app, slow_check, monkeypatch):
+    monkeypatch.setitem(app.config, 'AUTH_HASH_TIMEOUT', 0.05)
+    with app.app_context(), pytest.raises(VerifierBusy):
+        verify_password('hash', 'password')
+
+def test_authenticate(app_context):
+    auth.create_admin('quantri', 'quantri@example.com', 'mat-khau-dai')
+
+    assert auth.authenticate('quantri', 'mat-khau-dai').username == 'quantri'
+    assert auth.authenticate('quantri', 'sai') is None
+    assert auth.authenticate('khong-co', 'mat-khau-dai') is None
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+from datetime import datetime
+import pytest
+import bulk
+import catalog
+from app import db
+from bulk import import_orders, validate_record
+from models import Order
+
+@pytest.fixture
+def record():
+    return {'customer_name': 'Khách', 'customer_email': 'khach@example.com',
+            'service_type': catalog.SERVICES[0].id, 'plan_type': catalog.PRICING_PLANS[0].id}
+
+@pytest.mark.parametrize('created_at', ['2024-01-01T02:00:00+02:00', '2024-01-01T00:00:00Z',
+                                        '2023-12-31T19:00:00-05:00', '2024-01-01T00:00:00'])
+def test_timestamps_are_stored_as_naive_utc(app, record, created_at):
+    row, error = validate_record(dict(record, created_at=created_at))
+
+    assert error is None
+    assert row['created_at'] == datetime(2024, 1, 1) and row['created_at'].tzinfo is None
+
+def test_unparsable_timestamp_is_a_row_error(app, record):
+    assert validate_record(dict(record, created_at='01/01/2024')) == \
+        (None, 'created_at must be an ISO 8601 timestamp')
+
+def order_rows(count, **fields):
+    return [dict({'customer_name': f'Khách {i}', 'customer_email': f'khach{i}@example.com',
+                  'service_type': catalog.SERVICES[0].id, 'plan_type': catalog.PRICING_PLANS[0].id,
+                  'total_amount': 10}, **fields) for i in range(count)]
+
+def csv_stream(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+@pytest.fixture
+def inserts(monkeypatch):
+    """Sizes of the chunks passed to insert_rows"""
+    sizes = []
+    insert_rows = bulk.insert_rows
+    monkeypatch.setattr(bulk, 'insert_rows', lambda rows: sizes.append(len(rows)) or insert_rows(rows))
+    return sizes
+
+def test_rows_are_inserted_in_chunks(app_context, inserts):
+    report = import_orders(csv_stream(order_rows(25)), 'csv', chunk_size=10)
+
+    assert inserts == [10, 10, 5]
+    assert report.inserted == 25 and Order.query.count() == 25
+
+def test_failed_chunk_falls_back_to_single_rows(app_context, inserts, monkeypatch):
+    monkeypatch.setattr(bulk, 'compute_tx_hash', lambda payload: f"0x{payload['customer']}")
+    db.session.add(Order(customer_name='Cũ', customer_email='cu@example.com', service_type='x',
+                         plan_type='y', tx_hash='0xKhách 3'))
+    db.session.commit()
+
+    report = import_orders(csv_stream(order_rows(6)), 'csv', chunk_size=10)
+
+    assert inserts == [6]
+    assert report.inserted == 5
+    assert [error['row'] for error in report.errors] == [5]
+    assert report.errors[0]['error'].startswith('Database error')
+    assert Order.query.count() == 6
+
+def test_error_report_lists_each_invalid_row(app_context):
+    rows = order_rows(4)
+    rows[0]['customer_email'] = 'không-phải-email'
+    rows[2]['service_type'] = 'khong-co'
+
+    report = import_orders(csv_stream(rows), 'csv')
+
+    # CSV row 1 is the header
+    assert report.to_dict()['inserted'] == 2
+    assert [(error['row'], error['error'].split(':')[0]) for error in report.errors] == \
+        [(2, 'Invalid customer_email'), (4, "Unknown service_type 'khong-co'")]
+
+def test_jsonl_reports_unparsable_lines(app_context):
+    lines = [json.dumps(row) for row in order_rows(2)]
+    stream = io.StringIO('\n'.join([lines[0], '{not json', lines[1]]))
+
+    report = import_orders(stream, 'jsonl')
+
+    assert report.inserted == 2
+    assert [error['row'] for error in report.errors] == [2]
+
+def test_json_array_is_read_incrementally(app_context, inserts, monkeypatch):
+    monkeypatch.setattr(bulk, 'JSON_READ_SIZE', 256)
+    text = json.dumps(order_rows(30))
+
+    class Stream(io.StringIO):
+        read_at_first_insert = None
+
+        def read(self, size=-1):
+            assert size > 0, 'the whole document was requested'
+            return super().read(size)
+
+    stream = Stream(text)
+    insert_rows = bulk.insert_rows
+
+    def first_insert(rows):
+        if Stream.read_at_first_insert is None:
+            Stream.read_at_first_insert = stream.tell()
+        return insert_rows(rows)
+
+    monkeypatch.setattr(bulk, 'insert_rows', first_insert)
+    report = import_orders(stream, 'json', chunk_size=10)
+
+    assert report.inserted == 30
+    assert Stream.read_at_first_insert < len(text) / 2
+
+def test_json_upload_must_be_an_array(app_context):
+    report = import_orders(io.StringIO('{"customer_name": "Khách"}'), 'json')
+
+    assert report.inserted == 0
+    assert report.errors[0]['error'].startswith('Stream could not be read')
@@ -0,0 +1,47 @@
+import csv
+import io
+import pytest
+from app import db
+from exports import FEEDBACK_EXPORT_COLUMNS, export_response, iter_csv
+from models import Feedback
+
+def read_csv(chunks):
+    return list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+
+@pytest.mark.parametrize('value', ['=HYPERLINK("http://x","y")', '+1+1', '-2+3', '@SUM(A1)',
+                                   '\tcmd', '\rcmd'])
+def test_formula_cells_are_quoted(value):
+    rows = read_csv(iter_csv([(1, value)], ('id', 'name')))
+
+    assert rows[1] == ['1', "'" + value]
+
+def test_other_values_are_unchanged():
+    rows = read_csv(iter_csv([(1, 'Nguyễn Văn A', 'a@example.com', -5.0, None)],
+                             ('id', 'name', 'email', 'amount', 'phone')))
+
+    assert rows[1] == ['1', 'Nguyễn Văn A', 'a@example.com', '-5.0', '']
+
+def test_feedback_export_quotes_customer_fields(app, app_context):
+    db.session.add(Feedback(name='=cmd|"/c calc"!A1', email='khach@example.com',
+                            subject='@SUM(1)', message='-1+1'))
+    db.session.commit()
+
+    with app.test_request_context():
+        response = export_response(Feedback.query, Feedback, FEEDBACK_EXPORT_COLUMNS, 'csv', 'feedbacks')
+        header, row = read_csv(response.response)
+
+    record = dict(zip(header, row))
+    assert (record['name'], record['subject'], record['message']) == \
+        ('\'=cmd|"/c calc"!A1', "'@SUM(1)", "'-1+1")
+    assert record['email'] == 'khach@example.com'
+
+def test_streamed_export_returns_its_connection(app, app_context):
+    db.session.add(Feedback(name='Khách', email='khach@example.com', subject='Hỏi', message='Chào'))
+    db.session.commit()
+
+    with app.test_request_context():
+        response = export_response(Feedback.query, Feedback, FEEDBACK_EXPORT_COLUMNS, 'csv', 'feedbacks')
+    rows = read_csv(response.response)
+
+    assert len(rows) == 2
+    assert db.engine.pool.checkedout() == 0
@@ -0,0 +1,93 @@
+import time
+import pytest
+import ratelimit
+from ratelimit import MemoryBackend, RedisBackend, RateLimited
+
+@pytest.fixture
+def redis_backend():
+    fakeredis = pytest.importorskip('fakeredis')
+    return RedisBackend(fakeredis.FakeRedis())
+
+@pytest.fixture
+def limits_enabled(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+    yield
+    ratelimit.reset_backend()
+
+def take(backend, key, capacity, rate):
+    """Whether one bucket had a token, and the wait when it did not"""
+    rejected, retry_after = backend.acquire([(key, capacity, rate)])
+    return rejected is None, retry_after
+
+def test_redis_bucket_empties_after_capacity(redis_backend):
+    rate = 3 / 3600
+    results = [take(redis_backend, 'order:ip:1.2.3.4', 3, rate) for _ in range(4)]
+
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert results[-1][1] == pytest.approx(1 / rate, rel=0.01)
+    assert take(redis_backend, 'order:ip:5.6.7.8', 3, rate) == (True, 0.0)
+
+def test_redis_bucket_refills_and_expires(redis_backend):
+    assert take(redis_backend, 'contact:ip:1.2.3.4', 1, 20)[0]
+    assert not take(redis_backend, 'contact:ip:1.2.3.4', 1, 20)[0]
+    time.sleep(0.06)
+    assert take(redis_backend, 'contact:ip:1.2.3.4', 1, 20)[0]
+    # A bucket lives only as long as a full refill takes
+    assert 0 < redis_backend._client.pttl('ueher:ratelimit:contact:ip:1.2.3.4') <= 50
+
+def test_contact_posts_are_limited_through_redis(client, redis_backend, limits_enabled, monkeypatch):
+    monkeypatch.setattr(ratelimit, '_backend', redis_backend)
+    form = {'name': 'Khách', 'email': 'Khach@Example.com', 'message': 'Xin chào'}
+
+    statuses = [client.post('/contact', data=form).status_code for _ in range(6)]
+
+    assert statuses == [302] * 5 + [429]
+    response = client.post('/contact', data=dict(form, email='khac@example.com'))
+    assert response.status_code == 302
+    # contact:email allows 5/hour, so the next token is 12 minutes away
+    assert int(client.post('/contact', data=form).headers['Retry-After']) == pytest.approx(720, abs=2)
+
+def test_store_failure_lets_requests_through(limits_enabled, monkeypatch):
+    class Unavailable:
+        def acquire(self, buckets):
+            raise ConnectionError('store down')
+
+    monkeypatch.setattr(ratelimit, '_backend', Unavailable())
+    ratelimit.check('order', ip='1.2.3.4', email='khach@example.com')
+
+def test_check_raises_when_a_bucket_is_empty(limits_enabled, monkeypatch):
+    monkeypatch.setattr(ratelimit, '_backend', MemoryBackend(100))
+    for _ in range(10):
+        ratelimit.check('login', ip='1.2.3.4', ip_username='1.2.3.4|admin')
+
+    with pytest.raises(RateLimited):
+        ratelimit.check('login', ip='1.2.3.4', ip_username='1.2.3.4|admin')
+    ratelimit.check('login', ip='1.2.3.4', ip_username='1.2.3.4|other')
+
+def test_memory_backend_drops_least_recent_keys():
+    backend = MemoryBackend(max_keys=2)
+    take(backend, 'a', 1, 1 / 3600)
+    take(backend, 'b', 1, 1 / 3600)
+    take(backend, 'a', 1, 1 / 3600)
+    take(backend, 'c', 1, 1 / 3600)
+
+    # 'b' was dropped, so it starts over with a full bucket
+    assert take(backend, 'b', 1, 1 / 3600)[0]
+    assert not take(backend, 'c', 1, 1 / 3600)[0]
+
+@pytest.mark.parametrize('backend_name', ['memory', 'redis'])
+def test_refused_request_spends_no_token(backend_name, limits_enabled, monkeypatch, request):
+    backend = MemoryBackend(100) if backend_name == 'memory' else request.getfixturevalue('redis_backend')
+    monkeypatch.setattr(ratelimit, '_backend', backend)
+    # contact:email allows 5/hour, contact:ip 10/hour
+    for _ in range(5):
+        ratelimit.check('contact', ip='1.2.3.4', email='khach@example.com')
+    for _ in range(5):
+        with pytest.raises(RateLimited):
+            ratelimit.check('contact', ip='1.2.3.4', email='khach@example.com')
+
+    # The five refusals left the address's other five tokens in place
+    for i in range(5):
+        ratelimit.check('contact', ip='1.2.3.4', email=f'khac{i}@example.com')
+    with pytest.raises(RateLimited):
+        ratelimit.check('contact', ip='1.2.3.4', email='khac9@example.com')
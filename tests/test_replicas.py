@@ -0,0 +1,39 @@
+import pytest
+import routes
+from app import db
+from orders import new_order
+from replicas import STICKY_KEY
+
+@pytest.fixture
+def tx_hash(app, monkeypatch):
+    """Transaction hash of an order on the primary only; the replica has not caught up"""
+    monkeypatch.setattr(routes, 'render_template', lambda template, **context: template)
+    with app.app_context():
+        order = new_order(customer_name='Khách', customer_email='khach@example.com',
+                          service_type='schedule', plan_type='basic')
+        db.session.add(order)
+        db.session.commit()
+        return order.tx_hash
+
+def post_feedback(client):
+    return client.post('/contact', data={'name': 'Khách', 'email': 'khach@example.com',
+                                         'subject': 'Hỏi', 'message': 'Xin chào'})
+
+def test_read_only_view_reads_the_replica(client, tx_hash):
+    # Not found on the replica: flash and redirect home
+    assert client.get(f'/verify/{tx_hash}').status_code == 302
+
+def test_write_pins_the_client_to_the_primary(app, client, tx_hash):
+    assert post_feedback(client).status_code == 302
+    with client.session_transaction() as session:
+        assert STICKY_KEY in session
+
+    assert client.get(f'/verify/{tx_hash}').status_code == 200
+    # Other clients keep reading from the replica
+    assert app.test_client().get(f'/verify/{tx_hash}').status_code == 302
+
+def test_pin_expires(app, client, tx_hash, monkeypatch):
+    monkeypatch.setitem(app.config, 'REPLICA_STICKY_SECONDS', 0)
+    post_feedback(client)
+
+    assert client.get(f'/verify/{tx_hash}').status_code == 302
@@ -0,0 +1,60 @@
+import time
+import pytest
+import rollups
+from app import db
+from models import OrderDailyRollup, OrderRollupDelta
+from orders import new_order
+
+@pytest.fixture
+def no_auto_fold(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'ROLLUP_FOLD_INTERVAL', 3600)
+    monkeypatch.setattr(rollups, '_last_fold', time.monotonic())
+
+def add_orders(count, amount=10.0):
+    orders = [new_order(customer_name='Khách', customer_email='khach@example.com',
+                        service_type='schedule', plan_type='basic', total_amount=amount)
+              for _ in range(count)]
+    for order in orders:
+        db.session.add(order)
+        db.session.commit()
+    return orders
+
+def test_order_writes_append_deltas(app_context, no_auto_fold):
+    orders = add_orders(3)
+    orders[0].status = 'completed'
+    db.session.commit()
+
+    assert OrderDailyRollup.query.count() == 0
+    # One row per insert, two for the status change (out of pending, into completed)
+    assert OrderRollupDelta.query.count() == 5
+    kpis = rollups.order_kpis()
+    assert (kpis['total_orders'], kpis['pending_orders'], kpis['completed_orders']) == (3, 2, 1)
+    assert kpis['total_revenue'] == 30.0
+
+def test_fold_keeps_totals(app_context, no_auto_fold):
+    orders = add_orders(3)
+    orders[0].status = 'completed'
+    db.session.commit()
+    before = rollups.order_kpis()
+
+    assert rollups.fold_rollup_deltas() == 5
+    assert OrderRollupDelta.query.count() == 0
+    assert {(row.status, row.order_count) for row in OrderDailyRollup.query} == \
+        {('pending', 2), ('completed', 1)}
+    assert rollups.order_kpis() == before
+
+def test_commit_schedules_a_fold(app_context, monkeypatch):
+    monkeypatch.setattr(rollups, '_last_fold', 0.0)
+    add_orders(1)
+
+    # TASK_BACKEND=inline ran the fold right after the commit
+    assert OrderRollupDelta.query.count() == 0
+    assert rollups.order_kpis()['total_orders'] == 1
+
+def test_rebuild_drops_pending_deltas(app_context, no_auto_fold):
+    add_orders(2)
+
+    rollups.rebuild_rollups()
+
+    assert OrderRollupDelta.query.count() == 0
+    assert rollups.order_kpis()['total_orders'] == 2
@@ -0,0 +1,39 @@
+from datetime import datetime
+from app import db
+from models import BlogPost
+from search import BlogIndex
+
+STAMP = datetime(2024, 1, 15, 9, 30)
+
+def write_post(slug, title, updated_at, published=True):
+    # Core insert: the ORM commit hooks only see this worker's own changes
+    db.session.execute(db.insert(BlogPost).values(
+        slug=slug, title=title, content='Nội dung', published=published, updated_at=updated_at))
+    db.session.commit()
+
+def found(index, query):
+    return {db.session.get(BlogPost, post_id).slug for post_id, _ in index.search(query)}
+
+def test_sync_picks_up_posts_with_an_already_seen_timestamp(app, app_context):
+    index = BlogIndex(refresh_interval=0)
+    write_post('mot', 'Quản lý dự án', STAMP)
+    assert found(index, 'quan ly') == {'mot'}
+
+    write_post('hai', 'Quản lý nhân sự', STAMP)
+    write_post('ba', 'Quản lý kho', datetime(2023, 6, 1))
+
+    assert found(index, 'quan ly') == {'mot', 'hai', 'ba'}
+
+def test_sync_reindexes_edits_and_drops_unpublished_posts(app, app_context):
+    index = BlogIndex(refresh_interval=0)
+    write_post('mot', 'Quản lý dự án', STAMP)
+    write_post('hai', 'Quản lý nhân sự', STAMP)
+    assert found(index, 'quan ly') == {'mot', 'hai'}
+
+    db.session.execute(db.update(BlogPost).where(BlogPost.slug == 'mot').values(
+        title='Tuyển dụng', updated_at=datetime(2023, 6, 1)))
+    db.session.execute(db.update(BlogPost).where(BlogPost.slug == 'hai').values(published=False))
+    db.session.commit()
+
+    assert found(index, 'quan ly') == set()
+    assert found(index, 'tuyen dung') == {'mot'}